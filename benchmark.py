@@ -0,0 +1,195 @@
+#!/usr/bin/env python3
+"""
+Microbenchmarks of the per-row sync hot paths
+
+Runs without MSSQL or MariaDB on generated rows shaped like T58_InLineData.
+
+Usage:
+    python3 benchmark.py                 # all benchmarks, 100k rows
+    python3 benchmark.py clean --rows 500000
+"""
+import argparse
+import re
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+from columnar import build_column_transform
+from data_types import (build_row_transform, build_text_decoders, clean_typed_value, clean_value,
+                        decode_text_row, parse_mssql_datetime)
+from target_writer import encode_tsv_columns, encode_tsv_row
+
+COLUMN_TYPES = ['int', 'nvarchar(50)', 'datetime', 'int', 'nvarchar(50)', 'int', 'int', 'nvarchar(255)', 'int']
+
+
+def generate_rows(count: int) -> list:
+    """Generate typed rows as the source reader returns them"""
+    start = datetime(2025, 1, 1)
+    return [
+        (i, 'L1', start + timedelta(seconds=i), i % 7, ' red blue ', 5, 4, 'comment\r\nline', None)
+        for i in range(count)
+    ]
+
+
+def timed(func, *args, repeat: int = 3) -> float:
+    """Best wall time of func(*args) in seconds"""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def report(name: str, seconds: float, rows: int, baseline: float = None):
+    """Print one benchmark result line"""
+    line = f"  {name:<32} {seconds * 1000:9.1f} ms  {rows / seconds:12,.0f} rows/s"
+    if baseline:
+        line += f"  {baseline / seconds:5.1f}x"
+    print(line)
+
+
+def bench_clean(rows: int):
+    """Row cleaning: generic per-cell functions vs the per-table transform plan"""
+    data = generate_rows(rows)
+    transform = build_row_transform(COLUMN_TYPES)
+    
+    generic = timed(lambda: [[clean_value(value) for value in row] for row in data])
+    typed = timed(lambda: [[clean_typed_value(value) for value in row] for row in data])
+    planned = timed(lambda: [transform(row) for row in data])
+    
+    print(f"clean ({rows:,} rows x {len(COLUMN_TYPES)} columns)")
+    report('clean_value per cell', generic, rows)
+    report('clean_typed_value per cell', typed, rows, generic)
+    report('build_row_transform', planned, rows, generic)
+
+
+def _uncached_convert(value: str) -> str:
+    """Legacy-format conversion as clean_value did it before the parser was cached"""
+    if not re.match(r'^[A-Za-z]{3}\s+\d{1,2}\s+\d{4}\s+\d{1,2}:\d{2}[AP]M$', value):
+        return value
+    return datetime.strptime(' '.join(value.split()), '%b %d %Y %I:%M%p').strftime('%Y-%m-%d %H:%M:%S')
+
+
+def bench_datetime(rows: int):
+    """Datetime text conversion: re + strptime per value vs precompiled parser with LRU cache"""
+    start = datetime(2025, 4, 1)
+    # A few distinct timestamps per day, like production data
+    distinct = [start + timedelta(minutes=15 * i) for i in range(500)]
+    legacy = [value.strftime('%b %d %Y %I:%M%p').replace(' 0', '  ') for value in distinct]
+    iso = [value.strftime('%Y-%m-%d %H:%M:%S.000') for value in distinct]
+    legacy_values = [legacy[i % len(legacy)] for i in range(rows)]
+    iso_values = [iso[i % len(iso)] for i in range(rows)]
+    
+    def cached(values):
+        parse_mssql_datetime.cache_clear()
+        return [parse_mssql_datetime(value) for value in values]
+    
+    uncached_legacy = timed(lambda: [_uncached_convert(value) for value in legacy_values])
+    parsed_legacy = timed(lambda: [parse_mssql_datetime.__wrapped__(value) for value in legacy_values])
+    cached_legacy = timed(cached, legacy_values)
+    uncached_iso = timed(lambda: [datetime.fromisoformat(value.strip()) for value in iso_values])
+    cached_iso = timed(cached, iso_values)
+    
+    print(f"datetime ({rows:,} values, {len(distinct)} distinct)")
+    report("'Apr  1 2025 12:00AM' re+strptime", uncached_legacy, rows)
+    report("'Apr  1 2025 12:00AM' parser", parsed_legacy, rows, uncached_legacy)
+    report("'Apr  1 2025 12:00AM' cached", cached_legacy, rows, uncached_legacy)
+    report('ISO fromisoformat', uncached_iso, rows)
+    report('ISO cached', cached_iso, rows, uncached_iso)
+
+
+def bench_columnar(rows: int, batch_size: int = 1000):
+    """Bulk load transform + TSV encoding: row batches vs columnar batches"""
+    data = generate_rows(rows)
+    batches = [data[start:start + batch_size] for start in range(0, rows, batch_size)]
+    row_transform = build_row_transform(COLUMN_TYPES)
+    column_transform = build_column_transform(COLUMN_TYPES)
+    
+    def row_path():
+        for batch in batches:
+            b''.join(encode_tsv_row(row_transform(row)) for row in batch)
+    
+    def columnar_path():
+        for batch in batches:
+            encode_tsv_columns(column_transform(batch))
+    
+    row_clean = timed(lambda: [[row_transform(row) for row in batch] for batch in batches])
+    column_clean = timed(lambda: [column_transform(batch) for batch in batches])
+    row_total = timed(row_path)
+    column_total = timed(columnar_path)
+    
+    print(f"columnar ({rows:,} rows in batches of {batch_size})")
+    report('row transform', row_clean, rows)
+    report('column transform', column_clean, rows, row_clean)
+    report('row transform + TSV', row_total, rows)
+    report('column transform + TSV', column_total, rows, row_total)
+
+
+def measure_peak(func, *args) -> int:
+    """Peak bytes allocated while func(*args) runs, including its result"""
+    tracemalloc.start()
+    try:
+        result = func(*args)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    del result
+    return peak
+
+
+def bench_memory(rows: int):
+    """Peak memory of one batch from client text output to cleaned rows, per batch size"""
+    decoders = build_text_decoders(COLUMN_TYPES)
+    transform = build_row_transform(COLUMN_TYPES)
+    
+    def text_batch(size: int) -> list:
+        # Client output split into column strings, as _parse_output_lines yields it
+        return [[None if value is None else str(value) for value in row] for row in generate_rows(size)]
+    
+    def list_rows(lines):
+        # Decoded rows copied into cleaned lists
+        decoded = [decode_text_row(values, decoders) for values in lines]
+        return [[clean_typed_value(value) for value in row] for row in decoded]
+    
+    def tuple_rows(lines):
+        decoded = [decode_text_row(values, decoders) for values in lines]
+        return [transform(row) for row in decoded]
+    
+    print(f"memory (peak per batch after text output, {len(COLUMN_TYPES)} columns)")
+    for batch_size in sorted({1000, 5000, 10000, min(rows, 50000)}):
+        lines = text_batch(batch_size)
+        parse_mssql_datetime.cache_clear()
+        copied = measure_peak(list_rows, lines)
+        parse_mssql_datetime.cache_clear()
+        shared = measure_peak(tuple_rows, lines)
+        print(f"  batch {batch_size:>6}   lists {copied / 1048576:7.2f} MB ({copied / batch_size:5.0f} B/row)"
+              f"   tuples {shared / 1048576:7.2f} MB ({shared / batch_size:5.0f} B/row)")
+
+
+BENCHMARKS = {
+    'clean': bench_clean,
+    'datetime': bench_datetime,
+    'columnar': bench_columnar,
+    'memory': bench_memory,
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Sync hot path microbenchmarks')
+    parser.add_argument('benchmarks', nargs='*',
+                        help=f"Benchmarks to run: {', '.join(BENCHMARKS)} (default: all)")
+    parser.add_argument('--rows', type=int, default=100000, help='Rows per benchmark')
+    args = parser.parse_args()
+    
+    unknown = [name for name in args.benchmarks if name not in BENCHMARKS]
+    if unknown:
+        parser.error(f"unknown benchmark: {', '.join(unknown)}")
+    
+    for name in args.benchmarks or list(BENCHMARKS):
+        BENCHMARKS[name](args.rows)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,110 @@
+"""
+Source catalog prefetch
+
+Loads columns, types, primary keys, modify dates and approximate row counts
+(sys.partitions) of all configured tables with a single MSSQL query, so the
+number of metadata round trips at startup does not grow with the table count.
+Column types use the same format as the INFORMATION_SCHEMA query in
+DatabaseSyncer.get_table_structure.
+"""
+import logging
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+CATALOG_COLUMN_TYPES = ['nvarchar(128)', 'nvarchar(128)', 'nvarchar(300)', 'int', 'varchar(23)', 'bigint']
+
+
+class TableInfo:
+    """Catalog entry of one source table"""
+    
+    def __init__(self, name: str, modify_date: Optional[str], row_count: Optional[int]):
+        self.name = name
+        self.modify_date = modify_date
+        self.row_count = row_count
+        self.columns: List[Tuple[str, str]] = []
+        self.primary_key: List[str] = []
+
+
+def build_catalog_query(table_names: List[str]) -> str:
+    """Build the query returning one row per column of the given tables"""
+    names = ', '.join("'" + name.replace("'", "''") + "'" for name in table_names)
+    return f"""
+    SELECT c.TABLE_NAME, c.COLUMN_NAME, c.DATA_TYPE +
+           CASE
+               WHEN c.CHARACTER_MAXIMUM_LENGTH IS NOT NULL
+               THEN '(' + CAST(c.CHARACTER_MAXIMUM_LENGTH AS VARCHAR) + ')'
+               WHEN c.NUMERIC_PRECISION IS NOT NULL AND c.NUMERIC_SCALE IS NOT NULL
+               THEN '(' + CAST(c.NUMERIC_PRECISION AS VARCHAR) + ',' + CAST(c.NUMERIC_SCALE AS VARCHAR) + ')'
+               ELSE ''
+           END AS FULL_TYPE,
+           CASE WHEN pk.COLUMN_NAME IS NULL THEN 0 ELSE 1 END AS IS_PRIMARY_KEY,
+           CONVERT(VARCHAR(23), o.modify_date, 126) AS MODIFY_DATE,
+           rc.row_count
+    FROM INFORMATION_SCHEMA.COLUMNS c
+    JOIN sys.objects o ON o.object_id = OBJECT_ID(QUOTENAME(c.TABLE_SCHEMA) + '.' + QUOTENAME(c.TABLE_NAME))
+    LEFT JOIN (
+        SELECT ku.TABLE_SCHEMA, ku.TABLE_NAME, ku.COLUMN_NAME
+        FROM INFORMATION_SCHEMA.TABLE_CONSTRAINTS tc
+        JOIN INFORMATION_SCHEMA.KEY_COLUMN_USAGE ku
+          ON ku.CONSTRAINT_NAME = tc.CONSTRAINT_NAME AND ku.TABLE_SCHEMA = tc.TABLE_SCHEMA
+        WHERE tc.CONSTRAINT_TYPE = 'PRIMARY KEY'
+    ) pk ON pk.TABLE_SCHEMA = c.TABLE_SCHEMA AND pk.TABLE_NAME = c.TABLE_NAME AND pk.COLUMN_NAME = c.COLUMN_NAME
+    LEFT JOIN (
+        SELECT object_id, SUM(rows) AS row_count
+        FROM sys.partitions
+        WHERE index_id IN (0, 1)
+        GROUP BY object_id
+    ) rc ON rc.object_id = o.object_id
+    WHERE c.TABLE_NAME IN ({names})
+    ORDER BY c.TABLE_NAME, c.ORDINAL_POSITION
+    """
+
+
+class SourceCatalog:
+    """In-memory metadata of the configured source tables"""
+    
+    def __init__(self):
+        self.tables: Dict[str, TableInfo] = {}
+    
+    def load(self, reader, table_names: List[str]) -> bool:
+        """
+        Load metadata of all tables with one query
+        
+        Args:
+            reader: SourceReader
+            table_names: Configured tables
+        
+        Returns:
+            True if the catalog was loaded (tables missing in MSSQL are simply absent)
+        """
+        self.tables = {}
+        if not table_names:
+            return True
+        
+        try:
+            rows = reader.execute(build_catalog_query(table_names), CATALOG_COLUMN_TYPES)
+        except Exception as e:
+            logger.warning(f"Could not load source catalog, reading metadata per table: {e}")
+            return False
+        
+        for table_name, column_name, full_type, is_primary_key, modify_date, row_count in rows:
+            info = self.tables.get(table_name)
+            if info is None:
+                info = TableInfo(table_name, modify_date, int(row_count) if row_count is not None else None)
+                self.tables[table_name] = info
+            info.columns.append((str(column_name).strip(), str(full_type).strip()))
+            if is_primary_key:
+                info.primary_key.append(str(column_name).strip())
+        
+        missing = [name for name in table_names if name not in self.tables]
+        if missing:
+            logger.warning(f"Tables not found in MSSQL: {', '.join(missing)}")
+        
+        logger.info(f"Loaded source catalog: {len(self.tables)} tables, "
+                    f"{sum(len(info.columns) for info in self.tables.values())} columns")
+        return True
+    
+    def get(self, table_name: str) -> Optional[TableInfo]:
+        """Get the catalog entry of a table (None if not loaded)"""
+        return self.tables.get(table_name)
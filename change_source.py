@@ -0,0 +1,242 @@
+"""
+Change based incremental sources
+
+Instead of filtering on a timestamp column, these sources ask SQL Server which
+rows changed since the last synced version, so updates to old rows and
+deletes are picked up and tables without a timestamp can sync incrementally.
+The version reached by a run is stored as the table's watermark.
+
+Changes are returned in batches of (operation, key, row) where operation is
+'I', 'U' or 'D' and row holds the source column values (None for deletes).
+"""
+import json
+import logging
+from typing import Iterator, List, Optional, Tuple
+
+from data_types import build_text_decoders, decode_text_row, format_sql_literal
+
+logger = logging.getLogger(__name__)
+
+Change = Tuple[str, object, Optional[tuple]]
+
+
+class ChangeSource:
+    """Interface for reading row changes between two versions"""
+    
+    name = 'base'
+    
+    def current_version(self, table_name: str) -> int:
+        """Get the version changes can be read up to"""
+        raise NotImplementedError
+    
+    def min_valid_version(self, table_name: str) -> int:
+        """Get the oldest watermark changes are still available from"""
+        return 0
+    
+    def iter_changes(self, table_name: str, primary_key: str, columns: List[str], column_types: List[str],
+                     since_version: int, until_version: int, batch_size: int,
+                     condition: str = '') -> Iterator[List[Change]]:
+        """
+        Yield batches of changes with since_version < version <= until_version
+        
+        Args:
+            table_name: Source table
+            primary_key: Primary key column (also part of columns)
+            columns: Source columns of the row values
+            column_types: SQL Server types of columns
+            since_version: Watermark of the last sync
+            until_version: Version returned by current_version()
+            batch_size: Changes per batch
+            condition: Optional table filter applied to inserted/updated rows
+        """
+        raise NotImplementedError
+
+
+class ChangeTrackingSource(ChangeSource):
+    """Reads net row changes from SQL Server Change Tracking (CHANGETABLE)"""
+    
+    name = 'change_tracking'
+    
+    def __init__(self, reader):
+        self.reader = reader
+    
+    def current_version(self, table_name: str) -> int:
+        rows = self.reader.execute("SELECT CHANGE_TRACKING_CURRENT_VERSION()", ['bigint'])
+        if not rows or rows[0][0] is None:
+            raise RuntimeError("Change Tracking is not enabled on the source database")
+        return rows[0][0]
+    
+    def min_valid_version(self, table_name: str) -> int:
+        rows = self.reader.execute(
+            f"SELECT CHANGE_TRACKING_MIN_VALID_VERSION(OBJECT_ID('{table_name}'))", ['bigint']
+        )
+        if not rows or rows[0][0] is None:
+            raise RuntimeError(f"Change Tracking is not enabled on table {table_name}")
+        return rows[0][0]
+    
+    def iter_changes(self, table_name: str, primary_key: str, columns: List[str], column_types: List[str],
+                     since_version: int, until_version: int, batch_size: int,
+                     condition: str = '') -> Iterator[List[Change]]:
+        key_type = column_types[columns.index(primary_key)]
+        select = self.reader.select_list([f"T.{col}" for col in columns], column_types)
+        last_key = None
+        
+        while True:
+            query = (f"SELECT TOP {batch_size} CT.SYS_CHANGE_OPERATION, CT.{primary_key}, {select} "
+                     f"FROM CHANGETABLE(CHANGES {table_name}, {int(since_version)}) AS CT "
+                     f"LEFT JOIN {table_name} AS T ON T.{primary_key} = CT.{primary_key} "
+                     f"WHERE CT.SYS_CHANGE_VERSION <= {int(until_version)}")
+            if condition:
+                query += f" AND (T.{primary_key} IS NULL OR ({condition}))"
+            if last_key is not None:
+                query += f" AND CT.{primary_key} > {format_sql_literal(last_key)}"
+            query += f" ORDER BY CT.{primary_key}"
+            
+            rows = self.reader.execute(query, ['nchar(1)', key_type] + list(column_types))
+            if not rows:
+                break
+            
+            batch = []
+            for row in rows:
+                operation, key, values = row[0], row[1], tuple(row[2:])
+                # A row deleted after its change was recorded has no current values
+                if operation == 'D' or values[columns.index(primary_key)] is None:
+                    batch.append(('D', key, None))
+                else:
+                    batch.append((operation, key, values))
+            yield batch
+            
+            last_key = rows[-1][1]
+            if len(rows) < batch_size:
+                break
+
+
+class RowVersionSource(ChangeSource):
+    """
+    Reads inserted and updated rows by a rowversion column
+    
+    rowversion does not record deletes, so only 'U' changes are produced.
+    """
+    
+    name = 'rowversion'
+    
+    def __init__(self, reader, rowversion_column: str):
+        self.reader = reader
+        self.rowversion_column = rowversion_column
+    
+    def current_version(self, table_name: str) -> int:
+        # Stay below versions of transactions that are still open
+        rows = self.reader.execute("SELECT CAST(MIN_ACTIVE_ROWVERSION() AS BIGINT) - 1", ['bigint'])
+        return rows[0][0]
+    
+    def iter_changes(self, table_name: str, primary_key: str, columns: List[str], column_types: List[str],
+                     since_version: int, until_version: int, batch_size: int,
+                     condition: str = '') -> Iterator[List[Change]]:
+        key_index = columns.index(primary_key)
+        rowversion = self.rowversion_column
+        last_version = int(since_version)
+        
+        while True:
+            query = (f"SELECT TOP {batch_size} {self.reader.select_list(columns, column_types)}, "
+                     f"CAST({rowversion} AS BIGINT) "
+                     f"FROM {table_name} "
+                     f"WHERE {rowversion} > 0x{last_version:016X} AND {rowversion} <= 0x{int(until_version):016X}")
+            if condition:
+                query += f" AND ({condition})"
+            query += f" ORDER BY {rowversion}"
+            
+            rows = self.reader.execute(query, list(column_types) + ['bigint'])
+            if not rows:
+                break
+            
+            yield [('U', row[key_index], tuple(row[:-1])) for row in rows]
+            
+            last_version = rows[-1][-1]
+            if len(rows) < batch_size:
+                break
+
+
+class RecordedChangeSource(ChangeSource):
+    """
+    Replays changes recorded in a JSON file instead of querying SQL Server
+    
+    File format::
+        
+        {"T59_TransInLine": {
+            "current_version": 12,
+            "min_valid_version": 0,
+            "changes": [
+                {"version": 10, "operation": "U", "key": 17, "row": {"ID": 17, "item": 5, ...}},
+                {"version": 11, "operation": "D", "key": 18}
+            ]}}
+    
+    Row values are decoded with the column types like command line output.
+    """
+    
+    name = 'recorded'
+    
+    def __init__(self, path: str):
+        with open(path, 'r') as f:
+            self.recorded = json.load(f)
+    
+    def _table(self, table_name: str) -> dict:
+        if table_name not in self.recorded:
+            raise RuntimeError(f"No recorded changes for table {table_name}")
+        return self.recorded[table_name]
+    
+    def current_version(self, table_name: str) -> int:
+        return self._table(table_name)['current_version']
+    
+    def min_valid_version(self, table_name: str) -> int:
+        return self._table(table_name).get('min_valid_version', 0)
+    
+    def iter_changes(self, table_name: str, primary_key: str, columns: List[str], column_types: List[str],
+                     since_version: int, until_version: int, batch_size: int,
+                     condition: str = '') -> Iterator[List[Change]]:
+        decoders = build_text_decoders(column_types)
+        
+        # Net change per key, like CHANGETABLE(CHANGES ...)
+        latest = {}
+        for change in self._table(table_name).get('changes', []):
+            if since_version < change['version'] <= until_version:
+                latest[change['key']] = change
+        
+        batch = []
+        for key in sorted(latest):
+            change = latest[key]
+            if change['operation'] == 'D':
+                batch.append(('D', key, None))
+            else:
+                values = [change['row'].get(col) for col in columns]
+                texts = [None if value is None else str(value) for value in values]
+                batch.append((change['operation'], key, tuple(decode_text_row(texts, decoders))))
+            
+            if len(batch) >= batch_size:
+                yield batch
+                batch = []
+        
+        if batch:
+            yield batch
+
+
+def create_change_source(config, reader, table_name: str) -> ChangeSource:
+    """
+    Create the change source configured for a table
+    
+    MSSQL_CHANGES_FIXTURE points to a recorded changes file that replaces the
+    server for every table (for tests).
+    """
+    fixture = config.get_mssql_config().get('changes_fixture')
+    if fixture:
+        return RecordedChangeSource(fixture)
+    
+    source = config.get_incremental_source(table_name)
+    if source == 'change_tracking':
+        return ChangeTrackingSource(reader)
+    if source == 'rowversion':
+        rowversion_column = config.get_rowversion_column(table_name)
+        if not rowversion_column:
+            raise ValueError(f"Table {table_name}: incremental_source 'rowversion' requires 'rowversion_column'")
+        return RowVersionSource(reader, rowversion_column)
+    
+    raise ValueError(f"Unknown incremental_source '{source}' for table {table_name}")
@@ -7,6 +7,19 @@ import shutil
 import subprocess
 from typing import Dict, Any, Optional, List
 
+# Column separator for sqlcmd/tsql output (ASCII unit separator, never present in table data)
+MSSQL_FIELD_SEPARATOR = '\x1f'
+
+# Session settings applied to each MariaDB sync connection (SYNC_SESSION_PROFILE)
+SESSION_PROFILES = {
+    'default': [],
+    'bulk': [
+        "SET SESSION unique_checks = 0",
+        "SET SESSION foreign_key_checks = 0",
+        "SET autocommit = 0",
+    ],
+}
+
 class DatabaseConfig:
     """Database configuration class with environment variable support"""
     
@@ -16,7 +29,11 @@ class DatabaseConfig:
             'database': os.getenv('MSSQL_DATABASE', 'Production'),
             'username': os.getenv('MSSQL_USERNAME', 'production'),
             'password': os.getenv('MSSQL_PASSWORD', 'Toray@123'),
-            'port': int(os.getenv('MSSQL_PORT', '1433'))
+            'port': int(os.getenv('MSSQL_PORT', '1433')),
+            'driver': os.getenv('MSSQL_DRIVER', 'auto'),  # auto, pymssql, pyodbc, cli, sqlite
+            'odbc_driver': os.getenv('MSSQL_ODBC_DRIVER', 'ODBC Driver 18 for SQL Server'),
+            'sqlite_path': os.getenv('MSSQL_SQLITE_PATH'),  # Local stand-in source for testing
+            'changes_fixture': os.getenv('MSSQL_CHANGES_FIXTURE')  # Recorded changes replacing Change Tracking (testing)
         }
         
         # Auto-detect ERPNext site database
@@ -31,8 +48,28 @@ class DatabaseConfig:
         }
         
         self.sync_config = {
-            'batch_size': int(os.getenv('SYNC_BATCH_SIZE', '1000')),
-            'max_retries': int(os.getenv('SYNC_MAX_RETRIES', '3'))
+            'batch_size': int(os.getenv('SYNC_BATCH_SIZE', '1000')),  # Initial batch size of tables without a tuned size
+            'min_batch_size': int(os.getenv('SYNC_MIN_BATCH', '100')),  # Adaptive batch size bounds (equal = fixed batch size)
+            'max_batch_size': int(os.getenv('SYNC_MAX_BATCH', '10000')),
+            'batch_target_seconds': float(os.getenv('SYNC_BATCH_TARGET_SECONDS', '0.5')),  # Fetch/write time per batch the size is tuned to
+            'max_retries': int(os.getenv('SYNC_MAX_RETRIES', '3')),
+            'max_workers': int(os.getenv('SYNC_MAX_WORKERS', '4')),  # Tables synced in parallel
+            'partition_workers': int(os.getenv('SYNC_PARTITION_WORKERS', '4')),  # Concurrent chunks per partitioned table
+            'pipeline_depth': int(os.getenv('SYNC_PIPELINE_DEPTH', '2')),  # Batches buffered between fetch/transform/load
+            'max_rows_per_second': float(os.getenv('SYNC_MAX_ROWS_PER_SEC', '0')),  # 0 = no write rate ceiling
+            'target_write_latency': float(os.getenv('SYNC_TARGET_WRITE_LATENCY', '1.0')),  # Back off when a batch write is slower
+            'load_strategy': os.getenv('SYNC_LOAD_STRATEGY', 'executemany'),  # 'executemany', 'multirow' or 'bulk' (LOAD DATA LOCAL INFILE, full sync only)
+            'bulk_rows': int(os.getenv('SYNC_BULK_ROWS', '50000')),  # Rows spooled per LOAD DATA statement
+            'columnar': os.getenv('SYNC_COLUMNAR', 'false').lower() in ('1', 'true', 'yes'),  # Clean and encode bulk load batches per column
+            'commit_rows': int(os.getenv('SYNC_COMMIT_ROWS', '0')),  # Commit after this many written rows (0 = every batch)
+            'session_profile': os.getenv('SYNC_SESSION_PROFILE', 'default'),  # See SESSION_PROFILES
+            'exact_row_count': os.getenv('SYNC_EXACT_ROW_COUNT', 'false').lower() in ('1', 'true', 'yes'),  # COUNT(*) instead of estimates for progress
+            'reconcile_fanout': int(os.getenv('SYNC_RECONCILE_FANOUT', '16')),  # Buckets per key range level in --reconcile
+            'reconcile_leaf_rows': int(os.getenv('SYNC_RECONCILE_LEAF_ROWS', '1000')),  # Buckets up to this size are compared row by row
+            'max_deletes': int(os.getenv('SYNC_MAX_DELETES', '1000')),  # Skip delete propagation above this many rows per table (0 = no limit)
+            'poll_interval': float(os.getenv('SYNC_POLL_INTERVAL', '10')),  # --daemon: seconds between polls of an incremental table
+            'full_poll_interval': float(os.getenv('SYNC_FULL_POLL_INTERVAL', '3600')),  # --daemon: seconds between full table rebuilds
+            'daemon_max_interval': float(os.getenv('SYNC_DAEMON_MAX_INTERVAL', '300'))  # --daemon: back-off limit for idle tables
         }
         
         # Table sync configuration
@@ -52,7 +89,9 @@ class DatabaseConfig:
                 '-P', self.mssql_config['password'],
                 '-d', self.mssql_config['database'],
                 '-h', '-1',  # No headers
-                '-W'         # Remove trailing spaces
+                '-W',        # Remove trailing spaces
+                '-b',        # Exit with an error code on T-SQL errors
+                '-s', MSSQL_FIELD_SEPARATOR  # Delimit columns so values with spaces stay intact
             ]
         
         # Option 2: tsql (FreeTDS)
@@ -62,7 +101,9 @@ class DatabaseConfig:
                 '-S', self.mssql_config['server'],
                 '-U', self.mssql_config['username'],
                 '-P', self.mssql_config['password'],
-                '-D', self.mssql_config['database']
+                '-D', self.mssql_config['database'],
+                '-o', 'fhq',  # No footer, no header, no prompts
+                '-t', MSSQL_FIELD_SEPARATOR
             ]
         
         # No SQL Server client found
@@ -217,6 +258,7 @@ class DatabaseConfig:
                 'sync_mode': 'incremental',  # 'full' or 'incremental'
                 'timestamp_column': None ,  # Column for incremental sync tracking
                 'primary_key': 'ID',  # Primary key for upsert operations
+                'change_detection': 'hash',  # Only upsert rows whose checksum changed
                 'column_mapping': {
                     'X14': 'style_no',
                     'X15': 'style_text',
@@ -231,6 +273,7 @@ class DatabaseConfig:
                 'sync_mode': 'incremental',  # 'full' or 'incremental'
                 'timestamp_column': 'X02',  # Column for incremental sync tracking
                 'primary_key': 'ID',  # Primary key for upsert operations
+                'partitions': 4,  # Split ID range into chunks synced concurrently
                 'column_mapping': {  # Map MSSQL columns to MariaDB columns 
                     'X01': 'line',
                     'X02': 'date',  # datetime column
@@ -249,6 +292,7 @@ class DatabaseConfig:
                 'sync_mode': 'incremental',  # 'full' or 'incremental'
                 'timestamp_column': None,  # Column for incremental sync tracking
                 'primary_key': 'ID',  # Primary key for upsert operations
+                'change_detection': 'hash',  # Only upsert rows whose checksum changed
                 'column_mapping': {  # Map MSSQL columns to MariaDB columns 
                     'item': 'item_id',
                     'Process': 'process_id',  # Note: uppercase P in MSSQL
@@ -294,6 +338,66 @@ class DatabaseConfig:
         table_config = self.table_sync_config.get(table_name, {})
         return table_config.get('primary_key', 'ID')
     
+    def get_change_detection(self, table_name: str) -> Optional[str]:
+        """Get change detection method for incremental sync ('hash' or None)"""
+        table_config = self.table_sync_config.get(table_name, {})
+        return table_config.get('change_detection')
+    
+    def get_incremental_source(self, table_name: str) -> Optional[str]:
+        """Get change based incremental source ('change_tracking', 'rowversion' or None for timestamp)"""
+        table_config = self.table_sync_config.get(table_name, {})
+        return table_config.get('incremental_source')
+    
+    def get_rowversion_column(self, table_name: str) -> Optional[str]:
+        """Get rowversion column used by incremental_source 'rowversion'"""
+        table_config = self.table_sync_config.get(table_name, {})
+        return table_config.get('rowversion_column')
+    
+    def get_propagate_deletes(self, table_name: str) -> bool:
+        """Check if rows deleted in MSSQL are deleted from MariaDB in incremental mode"""
+        table_config = self.table_sync_config.get(table_name, {})
+        return bool(table_config.get('propagate_deletes', False))
+    
+    def get_poll_interval(self, table_name: str) -> float:
+        """Get daemon polling interval in seconds (table 'poll_interval' or the mode default)"""
+        table_config = self.table_sync_config.get(table_name, {})
+        if table_config.get('poll_interval'):
+            return float(table_config['poll_interval'])
+        if self.get_sync_mode(table_name) == 'full':
+            return self.sync_config['full_poll_interval']
+        return self.sync_config['poll_interval']
+    
+    def get_partitions(self, table_name: str) -> int:
+        """Get number of primary key range chunks to sync concurrently (1 = serial)"""
+        table_config = self.table_sync_config.get(table_name, {})
+        return max(1, int(table_config.get('partitions') or 1))
+    
+    def get_load_strategy(self, table_name: str) -> str:
+        """Get load strategy for a table ('executemany' or 'bulk')"""
+        table_config = self.table_sync_config.get(table_name, {})
+        return table_config.get('load_strategy') or self.sync_config['load_strategy']
+    
+    def get_columnar(self, table_name: str) -> bool:
+        """Check if bulk load batches of a table are transformed per column"""
+        table_config = self.table_sync_config.get(table_name, {})
+        return bool(table_config.get('columnar', self.sync_config['columnar']))
+    
+    def uses_bulk_load(self) -> bool:
+        """Check if any synced table loads with LOAD DATA LOCAL INFILE"""
+        return any(self.get_load_strategy(name) == 'bulk'
+                   for name, table_config in self.table_sync_config.items() if table_config.get('sync'))
+    
+    def get_session_profile(self, profile: str) -> List[str]:
+        """Get session tuning statements for a profile name"""
+        if profile not in SESSION_PROFILES:
+            raise ValueError(f"Unknown session profile '{profile}', expected one of {list(SESSION_PROFILES)}")
+        return SESSION_PROFILES[profile]
+    
+    def get_secondary_indexes(self, table_name: str) -> list:
+        """Get secondary indexes for a table (each a column name or list of column names)"""
+        table_config = self.table_sync_config.get(table_name, {})
+        return table_config.get('indexes') or []
+    
     def get_column_mapping(self, table_name: str) -> Optional[Dict[str, str]]:
         """Get column mapping for a table (MSSQL -> MariaDB)"""
         table_config = self.table_sync_config.get(table_name, {})
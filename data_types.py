@@ -1,6 +1,11 @@
 """
 Data type conversion utilities for MSSQL to MariaDB migration
 """
+import re
+from datetime import datetime, date, time
+from decimal import Decimal, InvalidOperation
+from functools import lru_cache
+from typing import Any, Callable, List, Optional
 
 def convert_datatype(sql_server_type: str) -> str:
     """
@@ -67,6 +72,114 @@ def convert_datatype(sql_server_type: str) -> str:
     return 'TEXT'
 
 
+def clean_typed_value(value):
+    """
+    Clean a value that is already decoded to its Python type
+    
+    Only strings need sanitizing; datetimes and numbers come from the
+    decoder or driver and are passed through without re-parsing.
+    
+    Args:
+        value: Typed value from the source reader
+    
+    Returns:
+        Cleaned value ready for insertion
+    """
+    if isinstance(value, str):
+        value = value.replace('\x00', '').replace('\r', '').replace('\n', ' ').strip()
+        return value if value else None
+    
+    return value
+
+
+def clean_typed_row(row) -> tuple:
+    """Clean every value of a row with clean_typed_value (column types unknown)"""
+    return tuple([clean_typed_value(value) for value in row])
+
+
+def _clean_datetime(value):
+    # Drivers return datetime objects; only text output needs parsing
+    if isinstance(value, str):
+        try:
+            return parse_mssql_datetime(value) if value.strip() else None
+        except ValueError:
+            return clean_typed_value(value)
+    return value
+
+
+# Column types whose values are passed through unchanged
+_PASSTHROUGH_TYPES = {
+    'int', 'bigint', 'smallint', 'tinyint', 'bit', 'decimal', 'numeric', 'money', 'smallmoney',
+    'float', 'real', 'date', 'time', 'timestamp', 'rowversion', 'binary', 'varbinary', 'image'
+}
+_TEXT_TYPES = {'char', 'varchar', 'nchar', 'nvarchar', 'text', 'ntext', 'xml', 'uniqueidentifier'}
+_DATETIME_TYPES = {'datetime', 'datetime2', 'smalldatetime', 'datetimeoffset'}
+
+
+def get_column_category(sql_server_type: str) -> str:
+    """
+    Classify a column type by the cleaning its values need
+    
+    Returns:
+        'passthrough' (numbers, dates, binary), 'text', 'datetime' or 'generic' (unknown types)
+    """
+    base_type = sql_server_type.split('(')[0].strip().lower()
+    if base_type in _PASSTHROUGH_TYPES:
+        return 'passthrough'
+    if base_type in _TEXT_TYPES:
+        return 'text'
+    if base_type in _DATETIME_TYPES:
+        return 'datetime'
+    return 'generic'
+
+
+_CATEGORY_CLEANERS = {'text': clean_typed_value, 'datetime': _clean_datetime, 'generic': clean_typed_value}
+
+
+def get_column_cleaner(sql_server_type: str) -> Optional[Callable[[Any], Any]]:
+    """Get the function cleaning one value of a column type (None if values pass through)"""
+    return _CATEGORY_CLEANERS.get(get_column_category(sql_server_type))
+
+
+def build_row_transform(sql_server_types: List[str]) -> Callable[[tuple], tuple]:
+    """
+    Build the function cleaning one row of a table, resolved once per table
+    
+    Numeric, date and binary columns pass through, text columns are
+    sanitized like clean_typed_value and datetime columns received as text
+    are parsed. Only columns that need work are visited per row.
+    
+    Rows stay tuples from the source reader to the writer: a row whose values
+    are all clean already is returned as is, and only rows with a changed
+    value are copied.
+    
+    Args:
+        sql_server_types: SQL Server column types in row order
+    
+    Returns:
+        Function taking a source row and returning the cleaned row
+    """
+    steps = [(index, cleaner) for index, cleaner in enumerate(map(get_column_cleaner, sql_server_types))
+             if cleaner is not None]
+    if not steps:
+        return tuple
+    
+    def transform(row) -> tuple:
+        values = None
+        for index, cleaner in steps:
+            value = row[index]
+            if value is not None:
+                cleaned = cleaner(value)
+                # Cleaners return the same object for values that need no change
+                if cleaned is not value:
+                    if values is None:
+                        values = list(row)
+                    values[index] = cleaned
+        return row if values is None else tuple(values)
+    
+    return transform
+
+
 def clean_value(value):
     """
     Clean and prepare value for MariaDB insertion
@@ -96,28 +209,183 @@ def clean_value(value):
     return value
 
 
+# Precompiled once; sqlcmd/tsql print datetimes either as ISO text or as 'Apr  1 2025 12:00AM'
+_LEGACY_DATETIME_PATTERN = re.compile(r'^([A-Za-z]{3})\s+(\d{1,2})\s+(\d{4})\s+(\d{1,2}):(\d{2})(?::(\d{2})(?::(\d{1,3}))?)?\s*([AaPp][Mm])$')
+_ISO_DATETIME_PATTERN = re.compile(r'^(\d{4})-(\d{2})-(\d{2})(?:[ T](\d{2}):(\d{2})(?::(\d{2})(?:\.(\d{1,7}))?)?)?$')
+_MONTHS = {name: index for index, name in enumerate(
+    ('jan', 'feb', 'mar', 'apr', 'may', 'jun', 'jul', 'aug', 'sep', 'oct', 'nov', 'dec'), 1)}
+
+# Distinct timestamps per batch are few, so repeated values are served from the cache
+DATETIME_CACHE_SIZE = 4096
+
+
 def _is_mssql_datetime_format(value: str) -> bool:
     """Check if value matches MSSQL datetime format like 'Apr  1 2025 12:00AM'"""
-    import re
-    # Pattern: Month Day Year Hour:MinuteAM/PM
-    pattern = r'^[A-Za-z]{3}\s+\d{1,2}\s+\d{4}\s+\d{1,2}:\d{2}[AP]M$'
-    return bool(re.match(pattern, value))
+    return _LEGACY_DATETIME_PATTERN.match(value) is not None
 
 
 def _convert_mssql_datetime(value: str) -> str:
     """Convert MSSQL datetime format to MariaDB format"""
     try:
-        from datetime import datetime
-        
-        # Parse MSSQL format: 'Apr  1 2025 12:00AM'
-        # Note: there might be extra spaces between month and day
-        cleaned_value = ' '.join(value.split())  # Remove extra spaces
-        dt = datetime.strptime(cleaned_value, '%b %d %Y %I:%M%p')
-        
         # Return in MariaDB format: 'YYYY-MM-DD HH:MM:SS'
-        return dt.strftime('%Y-%m-%d %H:%M:%S')
-        
+        return parse_mssql_datetime(value).strftime('%Y-%m-%d %H:%M:%S')
     except ValueError as e:
         # If parsing fails, return the original value and let MariaDB handle it
         print(f"Warning: Could not convert datetime '{value}': {e}")
-        return value
\ No newline at end of file
+        return value
+
+
+def _parse_legacy_datetime(value: str) -> datetime:
+    """Parse 'Apr  1 2025 12:00AM' (optionally with seconds and milliseconds)"""
+    match = _LEGACY_DATETIME_PATTERN.match(value)
+    month = _MONTHS.get(match.group(1).lower()) if match else None
+    if month is None:
+        raise ValueError(f"invalid datetime literal: {value!r}")
+    
+    month_name, day, year, hour, minute, second, millisecond, meridiem = match.groups()
+    hour = int(hour) % 12 + (12 if meridiem.upper() == 'PM' else 0)
+    return datetime(int(year), month, int(day), hour, int(minute), int(second or 0),
+                    int(millisecond or 0) * 1000)
+
+
+def _parse_iso_datetime(value: str) -> datetime:
+    """Parse 'YYYY-MM-DD[ HH:MM[:SS[.fffffff]]]' (datetime2 prints 7 fraction digits)"""
+    match = _ISO_DATETIME_PATTERN.match(value)
+    if not match:
+        # Offsets and other ISO variants
+        return datetime.fromisoformat(value)
+    
+    year, month, day, hour, minute, second, fraction = match.groups()
+    microsecond = int(fraction[:6].ljust(6, '0')) if fraction else 0
+    return datetime(int(year), int(month), int(day), int(hour or 0), int(minute or 0), int(second or 0),
+                    microsecond)
+
+
+@lru_cache(maxsize=DATETIME_CACHE_SIZE)
+def parse_mssql_datetime(value: str) -> datetime:
+    """
+    Parse datetime text printed by sqlcmd/tsql
+    
+    Handles ISO output ('2025-04-01 08:30:00.000') and the legacy
+    'Apr  1 2025 12:00AM' format. Results are cached per text value
+    (datetime objects are immutable, so sharing them is safe).
+    """
+    value = value.strip()
+    if value[:1].isdigit():
+        return _parse_iso_datetime(value)
+    return _parse_legacy_datetime(value)
+
+
+def _decode_int(value: str) -> int:
+    return int(value)
+
+
+def _decode_bit(value: str) -> int:
+    return 1 if value.strip() in ('1', 'True', 'true') else 0
+
+
+def _decode_decimal(value: str) -> Decimal:
+    try:
+        return Decimal(value.strip())
+    except InvalidOperation:
+        raise ValueError(f"invalid decimal literal: {value!r}")
+
+
+def _decode_float(value: str) -> float:
+    return float(value)
+
+
+def _decode_date(value: str) -> date:
+    return date.fromisoformat(value.strip()) if value.strip()[:1].isdigit() else parse_mssql_datetime(value).date()
+
+
+def _decode_time(value: str) -> time:
+    return time.fromisoformat(value.strip()[:15])
+
+
+# Line breaks in text columns are sent by the sqlcmd/tsql query as these control
+# characters (never present in table data), so every row stays on one output line
+CLIENT_CR_ESCAPE = '\x1d'
+CLIENT_LF_ESCAPE = '\x1e'
+
+
+def _decode_text(value: str) -> str:
+    if CLIENT_LF_ESCAPE in value or CLIENT_CR_ESCAPE in value:
+        return value.replace(CLIENT_CR_ESCAPE, '\r').replace(CLIENT_LF_ESCAPE, '\n')
+    return value
+
+
+_TEXT_DECODERS = {
+    'int': _decode_int,
+    'bigint': _decode_int,
+    'smallint': _decode_int,
+    'tinyint': _decode_int,
+    'bit': _decode_bit,
+    'decimal': _decode_decimal,
+    'numeric': _decode_decimal,
+    'money': _decode_decimal,
+    'smallmoney': _decode_decimal,
+    'float': _decode_float,
+    'real': _decode_float,
+    'datetime': parse_mssql_datetime,
+    'datetime2': parse_mssql_datetime,
+    'smalldatetime': parse_mssql_datetime,
+    'date': _decode_date,
+    'time': _decode_time,
+}
+
+
+def get_text_decoder(sql_server_type: str) -> Callable[[str], Any]:
+    """
+    Get the function that converts client text output to a Python value
+    
+    Args:
+        sql_server_type: SQL Server column type (e.g., 'nvarchar(50)', 'int')
+    
+    Returns:
+        Decoder function; strings and unknown types are returned unchanged
+    """
+    base_type = sql_server_type.split('(')[0].strip().lower()
+    return _TEXT_DECODERS.get(base_type, _decode_text)
+
+
+def build_text_decoders(sql_server_types: List[str]) -> List[Callable[[str], Any]]:
+    """Build one decoder per column for a query result"""
+    return [get_text_decoder(sql_type) for sql_type in sql_server_types]
+
+
+def decode_text_row(values: List[Optional[str]], decoders: List[Callable[[str], Any]]) -> tuple:
+    """
+    Decode one row of client text output to typed values
+    
+    Raises:
+        ValueError: if the column count or a value does not match the column types
+    """
+    if len(values) != len(decoders):
+        raise ValueError(f"expected {len(decoders)} columns, got {len(values)}")
+    return tuple(None if value is None else decoder(value) for value, decoder in zip(values, decoders))
+
+
+def format_sql_literal(value) -> str:
+    """
+    Format a typed value as a SQL Server literal for use in WHERE clauses
+    
+    Args:
+        value: int, Decimal, datetime, date or string value
+        
+    Returns:
+        Literal text (strings and dates quoted, quotes escaped)
+    """
+    if value is None:
+        return 'NULL'
+    if isinstance(value, bool):
+        return '1' if value else '0'
+    if isinstance(value, (int, float, Decimal)):
+        return str(value)
+    if isinstance(value, datetime):
+        # ISO 8601 with millisecond precision is unambiguous for every DATEFORMAT
+        return f"'{value.strftime('%Y-%m-%dT%H:%M:%S.%f')[:-3]}'"
+    if isinstance(value, date):
+        return f"'{value.strftime('%Y%m%d')}'"
+    text = str(value).replace("'", "''")
+    return f"N'{text}'"
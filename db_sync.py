@@ -4,19 +4,47 @@ Optimized MSSQL to MariaDB Data Synchronization Tool
 Consolidates and improves upon existing migration scripts
 """
 
-import subprocess
 import mysql.connector
 from mysql.connector import Error as MySQLError
 import logging
 import sys
 import os
 from datetime import datetime
-from typing import List, Tuple
+from typing import Callable, List, Optional, Tuple
 import time
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from itertools import islice
 
 from config import DatabaseConfig
-from data_types import convert_datatype, clean_value
+from data_types import convert_datatype, clean_typed_row, build_row_transform, format_sql_literal, parse_mssql_datetime
 from sync_tracker import SyncTracker
+from source_reader import create_source_reader
+from pipeline import AdaptiveRateLimiter, BatchSizeController, StageStats, run_pipeline
+from target_writer import TargetWriter, ExecuteManyWriter, MultiRowWriter, BulkLoadWriter
+from row_hashes import RowHashStore, build_source_hash_query, find_changed_keys
+from reconcile import TableReconciler
+from change_source import create_change_source
+from delete_sync import find_orphan_ranges, count_keys
+from sync_daemon import SyncDaemon
+from schema_cache import SchemaCache, plan_schema_changes
+from catalog import SourceCatalog
+from row_count import build_partition_rows_query, estimate_rows_after_key
+from columnar import ColumnBatch, build_column_transform
+
+# Full syncs load into `<table>__staging` before swapping it over the live table
+STAGING_SUFFIX = '__staging'
+
+# Missing/extra/changed IDs found by --reconcile
+RECONCILE_REPORT_FILE = 'reconcile_report.json'
+
+def _estimate_batch_row_bytes(batch_data: List[tuple], sample_rows: int = 10) -> float:
+    """Average size of the first rows of a batch (text and binary by length, other values 8 bytes)"""
+    sample = batch_data[:sample_rows]
+    size = sum(len(value) if isinstance(value, (str, bytes)) else 8 for row in sample for value in row)
+    return size / len(sample) if sample else 0.0
+
 
 class DatabaseSyncer:
     """Main database synchronization class"""
@@ -24,9 +52,39 @@ class DatabaseSyncer:
     def __init__(self):
         self.config = DatabaseConfig()
         self.sync_tracker = SyncTracker()
-        self.mariadb_conn = None
+        # Connections are per thread so parallel table workers never share one
+        self._local = threading.local()
+        self._open_connections = []
+        self._connections_lock = threading.Lock()
+        self.table_stats = {}
+        self._max_allowed_packet = None
+        # Split large tables into concurrent key range chunks (the daemon polls serially instead)
+        self.partitioning = True
+        self.schema_cache = SchemaCache()
+        self.catalog = SourceCatalog()
         self.setup_logging()
         
+    @property
+    def mariadb_conn(self):
+        """MariaDB connection of the current thread"""
+        return getattr(self._local, 'mariadb_conn', None)
+    
+    @mariadb_conn.setter
+    def mariadb_conn(self, connection):
+        self._local.mariadb_conn = connection
+    
+    @property
+    def source_reader(self):
+        """MSSQL source reader of the current thread (created on first use)"""
+        reader = getattr(self._local, 'source_reader', None)
+        if reader is None:
+            reader = create_source_reader(self.config)
+            self._local.source_reader = reader
+            with self._connections_lock:
+                self._open_connections.append(reader)
+        return reader
+    
+    
     def setup_logging(self):
         """Setup logging configuration"""
         log_level = logging.DEBUG if os.getenv('DEBUG') else logging.INFO
@@ -58,7 +116,12 @@ class DatabaseSyncer:
             temp_conn.close()
             
             # Connect to the target database
+            if self.config.uses_bulk_load():
+                mariadb_config['allow_local_infile'] = True
             self.mariadb_conn = mysql.connector.connect(**mariadb_config)
+            self._apply_session_profile(self.mariadb_conn)
+            with self._connections_lock:
+                self._open_connections.append(self.mariadb_conn)
             self.logger.info("Connected to MariaDB successfully")
             return True
             
@@ -66,71 +129,51 @@ class DatabaseSyncer:
             self.logger.error(f"MariaDB connection failed: {e}")
             return False
     
-    def execute_mssql_query(self, query: str) -> List[List[str]]:
-        """Execute query on MSSQL using available client and return results"""
+    def execute_mssql_query(self, query: str, column_types: Optional[List[str]] = None) -> List[tuple]:
+        """
+        Execute a metadata query on MSSQL, returning [] on errors
+        
+        Only for lookups with a fallback (structure, row counts). Data and key
+        range queries use source_reader.execute so an error fails the sync
+        instead of looking like the end of the table.
+        """
         try:
-            cmd = self.config.mssql_command
-            client_type = self.config.mssql_client_type
-            
-            process = subprocess.Popen(
-                cmd,
-                stdin=subprocess.PIPE,
-                stdout=subprocess.PIPE,
-                stderr=subprocess.PIPE,
-                text=True
-            )
-            
-            stdout, stderr = process.communicate(input=f"{query}\nGO\n")
-            
-            if process.returncode != 0:
-                self.logger.error(f"MSSQL query failed: {stderr}")
-                return []
-            
-            return self._parse_query_output(stdout, client_type)
+            return self.source_reader.execute(query, column_types)
             
         except Exception as e:
             self.logger.error(f"Error executing MSSQL query: {e}")
             return []
     
-    def _parse_query_output(self, stdout: str, client_type: str) -> List[List[str]]:
-        """Parse SQL client output into structured data"""
-        lines = stdout.strip().split('\n')
-        results = []
+    def close_connections(self):
+        """Close MariaDB and MSSQL connections opened by any thread"""
+        with self._connections_lock:
+            connections = self._open_connections
+            self._open_connections = []
         
-        skip_patterns = ['locale is', 'charset is', 'using default charset', '---', '1>', '2>', 'COLUMN_NAME', 'Setting Production']
+        for connection in connections:
+            try:
+                connection.close()
+            except Exception as e:
+                self.logger.warning(f"Error closing connection: {e}")
         
-        for line in lines:
-            line = line.strip()
-            
-            if not line:
-                continue
-                
-            # Skip specific patterns
-            if any(pattern in line for pattern in skip_patterns):
-                continue
-                
-            # Skip lines that start with "(" followed by numbers (like "(72 rows affected)")
-            if line.startswith('(') and ('rows affected' in line or 'row affected' in line):
+        self._local = threading.local()
+        self.logger.info(f"Closed {len(connections)} database connections")
+    
+    def _close_thread_connections(self):
+        """Close the connections owned by the current (short-lived) worker thread"""
+        for attr in ('mariadb_conn', 'source_reader'):
+            connection = getattr(self._local, attr, None)
+            if connection is None:
                 continue
-                
-            # Parse based on client type
-            if client_type == 'sqlcmd':
-                values = [val.strip() if val.strip() != 'NULL' else None for val in line.split()]
-            else:
-                # tsql parsing - split by tab first, then whitespace
-                if '\t' in line:
-                    values = [val.strip() if val.strip() != 'NULL' else None for val in line.split('\t')]
-                else:
-                    values = [val.strip() if val.strip() != 'NULL' else None for val in line.split()]
-                
-                # Don't remove empty values - they represent actual columns with empty data
-                # values = [val for val in values if val is not None]
             
-            # Accept rows with any number of values (including single values like COUNT results)
-            if values:
-                results.append(values)
-        
-        return results
+            with self._connections_lock:
+                if connection in self._open_connections:
+                    self._open_connections.remove(connection)
+            try:
+                connection.close()
+            except Exception:
+                pass
+            setattr(self._local, attr, None)
     
     def get_table_list(self) -> List[str]:
         """Get list of tables to sync from configuration"""
@@ -139,8 +182,36 @@ class DatabaseSyncer:
         self.logger.info(f"Using configured tables: {len(tables)} tables")
         return tables
     
-    def get_table_structure(self, table_name: str) -> List[Tuple[str, str]]:
-        """Get table structure from MSSQL with optional column filtering"""
+    def _get_schema_fingerprint(self, table_name: str) -> Optional[str]:
+        """Get the table's modify_date from sys.objects (changes on every ALTER TABLE)"""
+        info = self.catalog.get(table_name)
+        if info is not None:
+            return info.modify_date
+        
+        try:
+            results = self.source_reader.execute(
+                f"SELECT CONVERT(VARCHAR(23), modify_date, 126) FROM sys.objects WHERE object_id = OBJECT_ID('{table_name}')",
+                ['varchar(23)']
+            )
+        except Exception as e:
+            self.logger.debug(f"Could not read modify_date of {table_name}: {e}")
+            return None
+        return str(results[0][0]) if results and results[0][0] else None
+    
+    def _get_source_columns(self, table_name: str) -> List[Tuple[str, str]]:
+        """Get (column, full type) from INFORMATION_SCHEMA, reusing the schema cache while modify_date is unchanged"""
+        info = self.catalog.get(table_name)
+        if info is not None:
+            # Keep the cache current for runs without a catalog (daemon, single table)
+            self.schema_cache.set_columns(table_name, info.modify_date, info.columns)
+            return list(info.columns)
+        
+        fingerprint = self._get_schema_fingerprint(table_name)
+        cached = self.schema_cache.get_columns(table_name, fingerprint)
+        if cached is not None:
+            self.logger.debug(f"Using cached structure of {table_name} (modified {fingerprint})")
+            return cached
+        
         query = f"""
         SELECT COLUMN_NAME, DATA_TYPE + 
                CASE 
@@ -156,16 +227,21 @@ class DatabaseSyncer:
         """
         
         results = self.execute_mssql_query(query)
+        columns = [(str(row[0]).strip(), str(row[1]).strip()) for row in results if len(row) >= 2 and row[0]]
+        if columns:
+            self.schema_cache.set_columns(table_name, fingerprint, columns)
+        return columns
+    
+    def get_table_structure(self, table_name: str) -> List[Tuple[str, str]]:
+        """Get table structure from MSSQL with optional column filtering"""
         columns = []
         
         # Get column filters for this table
         column_filters = self.config.get_table_columns(table_name)
         
-        for row in results:
-            if len(row) >= 2 and row[0]:
-                original_col_name = str(row[0]).strip()
+        for original_col_name, col_type in self._get_source_columns(table_name):
+            if original_col_name:
                 clean_col_name = self._clean_column_name(table_name, original_col_name)
-                col_type = str(row[1]).strip()
                 
                 # Apply column filter if specified (check against original names)
                 if column_filters:
@@ -201,22 +277,32 @@ class DatabaseSyncer:
         
         return clean_name
     
-    def create_mariadb_table(self, table_name: str, columns: List[Tuple[str, str]]) -> bool:
-        """Create table in MariaDB with converted data types"""
+    def create_mariadb_table(self, table_name: str, columns: List[Tuple[str, str]],
+                             target_table: Optional[str] = None) -> bool:
+        """Create table in MariaDB with converted data types (full sync creates target_table, the staging table)"""
+        target_table = target_table or table_name
         try:
             cursor = self.mariadb_conn.cursor()
             sync_mode = self.config.get_sync_mode(table_name)
             
-            # For full sync, drop and recreate table
+            # For full sync, drop and recreate the table being loaded (the live table is only replaced by the swap)
             if sync_mode == 'full':
-                cursor.execute(f"DROP TABLE IF EXISTS `{table_name}`")
+                cursor.execute(f"DROP TABLE IF EXISTS `{target_table}`")
             else:
+                # Source schema unchanged since the table was last checked: nothing to do
+                if self.schema_cache.is_target_current(table_name, columns):
+                    cursor.close()
+                    return True
+                
                 # For incremental sync, check if table exists
                 cursor.execute(f"SHOW TABLES LIKE '{table_name}'")
                 if cursor.fetchone():
                     self.logger.info(f"Table {table_name} exists, using incremental sync")
                     cursor.close()
-                    return True  # Table exists, no need to recreate
+                    if not self._apply_schema_drift(table_name, columns):
+                        return False
+                    self.schema_cache.set_target(table_name, columns)
+                    return True
             
             # Build CREATE TABLE statement
             column_definitions = []
@@ -244,7 +330,7 @@ class DatabaseSyncer:
                 column_definitions.append(f"PRIMARY KEY (`{primary_key}`)")
             
             create_sql = f"""
-            CREATE TABLE `{table_name}` (
+            CREATE TABLE `{target_table}` (
                 {', '.join(column_definitions)}
             ) ENGINE=InnoDB DEFAULT CHARSET=utf8mb4 COLLATE=utf8mb4_unicode_ci
             """
@@ -254,17 +340,73 @@ class DatabaseSyncer:
             cursor.close()
             
             mode_msg = "(full sync)" if sync_mode == 'full' else "(incremental sync)"
-            self.logger.info(f"Created table {table_name} with {len(columns)} columns {mode_msg}")
+            self.logger.info(f"Created table {target_table} with {len(columns)} columns {mode_msg}")
+            if sync_mode != 'full':
+                self.schema_cache.set_target(table_name, columns)
+                self._reset_row_hashes(table_name)
             return True
             
         except MySQLError as e:
             self.logger.error(f"Failed to create table {table_name}: {e}")
             return False
     
-    def get_table_row_count(self, table_name: str) -> int:
-        """Get total row count for a table from MSSQL"""
+    def _reset_row_hashes(self, table_name: str):
+        """Drop the row checksum baseline of a newly created table so every row is written again"""
+        if self.config.get_change_detection(table_name) != 'hash':
+            return
+        
+        store = RowHashStore(self.mariadb_conn)
+        store.ensure_table()
+        store.clear(table_name)
+        self.mariadb_conn.commit()
+        self.sync_tracker.clear_row_hashes(table_name)
+        self.logger.info(f"Table {table_name}: Cleared row checksums of the recreated table")
+    
+    def _apply_schema_drift(self, table_name: str, columns: List[Tuple[str, str]]) -> bool:
+        """Add new and widen changed columns of an existing incremental table"""
+        try:
+            cursor = self.mariadb_conn.cursor()
+            cursor.execute(
+                "SELECT COLUMN_NAME, COLUMN_TYPE FROM information_schema.COLUMNS "
+                "WHERE TABLE_SCHEMA = DATABASE() AND TABLE_NAME = %s",
+                (table_name,)
+            )
+            current = {str(name): str(column_type) for name, column_type in cursor.fetchall()}
+            
+            expected = [(col_name, convert_datatype(col_type)) for col_name, col_type in columns if col_name]
+            clauses, warnings = plan_schema_changes(expected, current)
+            for warning in warnings:
+                self.logger.warning(f"Table {table_name}: Schema drift: {warning}")
+            
+            if clauses:
+                alter_sql = f"ALTER TABLE `{table_name}` {', '.join(clauses)}"
+                self.logger.info(f"Table {table_name}: Applying schema change: {alter_sql}")
+                cursor.execute(alter_sql)
+            cursor.close()
+            return True
+            
+        except MySQLError as e:
+            self.logger.error(f"Failed to apply schema changes to {table_name}: {e}")
+            return False
+    
+    def get_table_row_count(self, table_name: str, exact: Optional[bool] = None) -> int:
+        """
+        Get the row count of a table for progress reporting
+        
+        Args:
+            table_name: Source table
+            exact: Run COUNT(*) instead of estimating (default: SYNC_EXACT_ROW_COUNT)
+        """
+        if exact is None:
+            exact = self.config.sync_config['exact_row_count']
+        
         condition = self._build_sync_condition(table_name)
         
+        if not exact:
+            estimate = self._estimate_row_count(table_name, condition)
+            if estimate is not None:
+                return estimate
+        
         if condition:
             query = f"SELECT COUNT(*) FROM {table_name} WHERE {condition}"
         else:
@@ -280,12 +422,53 @@ class DatabaseSyncer:
         
         return 0
     
-    def sync_table_data(self, table_name: str, columns: List[Tuple[str, str]]) -> bool:
-        """Sync data for a single table using batch processing"""
+    def _estimate_row_count(self, table_name: str, condition: str) -> Optional[int]:
+        """
+        Estimate rows matching the sync condition without scanning the table
+        
+        The total comes from sys.partitions (through the catalog when loaded).
+        Incremental tables with a stored watermark key count the share of the
+        primary key range after that key; other filters report the total as
+        an upper bound.
+        """
+        info = self.catalog.get(table_name)
+        total_rows = info.row_count if info is not None else None
+        try:
+            if total_rows is None:
+                results = self.source_reader.execute(build_partition_rows_query(table_name), ['bigint'])
+                if not results or results[0][0] is None:
+                    return None
+                total_rows = int(results[0][0])
+            
+            if not condition:
+                return total_rows
+            
+            last_key = self.sync_tracker.get_last_sync_key(table_name)
+            if self.config.get_sync_mode(table_name) != 'incremental' or last_key is None:
+                return total_rows
+            
+            primary_key = self.config.get_primary_key(table_name)
+            results = self.source_reader.execute(
+                f"SELECT MIN({primary_key}), MAX({primary_key}) FROM {table_name}", ['bigint', 'bigint']
+            )
+        except Exception as e:
+            self.logger.debug(f"Could not estimate row count of {table_name}: {e}")
+            return None
+        
+        if not results or results[0][0] is None:
+            return 0
+        estimate = estimate_rows_after_key(total_rows, results[0][0], results[0][1], last_key)
+        return total_rows if estimate is None else estimate
+    
+    def sync_table_data(self, table_name: str, columns: List[Tuple[str, str]], total_rows: Optional[int] = None,
+                        target_table: Optional[str] = None) -> bool:
+        """Sync data for a single table using batch processing (into target_table when given)"""
+        target_table = target_table or table_name
+        start = time.monotonic()
         try:
             sync_mode = self.config.get_sync_mode(table_name)
-            total_rows = self.get_table_row_count(table_name)
-            batch_size = self.config.sync_config['batch_size']
+            if total_rows is None:
+                total_rows = self.get_table_row_count(table_name)
             
             # Prepare column mappings
             original_columns, renamed_columns = self._get_column_mappings(table_name, columns)
@@ -295,49 +478,598 @@ class DatabaseSyncer:
                 sql_template = self._build_upsert_sql(table_name, renamed_columns)
                 mode_msg = "(incremental)"
             else:
-                sql_template = self._build_insert_sql(table_name, renamed_columns)
+                sql_template = self._build_insert_sql(target_table, renamed_columns)
                 mode_msg = "(full)"
             
+            # Bulk loading only applies to full syncs; upserts need INSERT ... ON DUPLICATE KEY UPDATE
+            load_strategy = self.config.get_load_strategy(table_name)
+            if load_strategy == 'bulk' and sync_mode != 'full':
+                load_strategy = 'executemany'
+            elif load_strategy == 'bulk':
+                mode_msg = "(full, bulk load)"
+            
+            # Columnar batches are encoded straight to LOAD DATA format by the bulk writer
+            column_transform = None
+            if self.config.get_columnar(table_name):
+                if load_strategy == 'bulk':
+                    column_transform = build_column_transform([col_type for _, col_type in columns])
+                    mode_msg = "(full, bulk load, columnar)"
+                else:
+                    self.logger.info(f"Table {table_name}: columnar mode only applies to bulk loads (full sync), using row batches")
+            
+            key_index = self._get_key_index(table_name, original_columns)
+            if key_index is None:
+                return False
+            
+            batch_controller = self._create_batch_controller(table_name)
+            
+            timestamp_column = self.config.get_timestamp_column(table_name)
+            timestamp_index = None
+            if sync_mode == 'incremental' and timestamp_column:
+                if timestamp_column in original_columns:
+                    timestamp_index = original_columns.index(timestamp_column)
+                else:
+                    self.logger.warning(f"Table {table_name}: {timestamp_column} is not among the synced columns, "
+                                        f"the watermark cannot advance")
+            
+            # Everything the batch loop needs, shared by all partitions of the table
+            plan = {
+                'table_name': table_name,
+                'target_table': target_table,
+                'sync_mode': sync_mode,
+                'columns': original_columns,
+                'column_types': [col_type for _, col_type in columns],
+                'expected_cols': len(renamed_columns),
+                'transform': build_row_transform([col_type for _, col_type in columns]),
+                'column_transform': column_transform,
+                'target_columns': renamed_columns,
+                'sql_template': sql_template,
+                'load_strategy': load_strategy,
+                'key_index': key_index,
+                'timestamp_index': timestamp_index,
+                'watermark': None,
+                'batch_size': batch_controller.size,
+                'batch_controller': batch_controller,
+                'total_rows': total_rows,
+                'synced_rows': 0,
+                'stage_stats': {},
+                'rate_limiter': AdaptiveRateLimiter(
+                    self.config.sync_config['max_rows_per_second'],
+                    self.config.sync_config['target_write_latency']
+                ),
+                'lock': threading.Lock()
+            }
+            
             self.logger.info(f"Table {table_name}: Syncing {total_rows or 'unknown'} rows {mode_msg}")
             
-            cursor = self.mariadb_conn.cursor()
-            offset = 0
-            synced_rows = 0
+            # Row hash change detection pages the source by an integer primary key
+            use_row_hash = sync_mode == 'incremental' and self.config.get_change_detection(table_name) == 'hash'
+            if use_row_hash:
+                primary_key = self.config.get_primary_key(table_name)
+                key_type = dict(columns).get(primary_key, '').lower().split('(')[0]
+                if key_type not in ('int', 'bigint', 'smallint', 'tinyint'):
+                    self.logger.warning(f"Table {table_name}: Row hash change detection needs an integer "
+                                        f"primary key ({primary_key} is {key_type or 'unknown'}), using batch sync")
+                    use_row_hash = False
+            
+            partitions = self.config.get_partitions(table_name) if self.partitioning else 1
+            if sync_mode == 'incremental' and self.config.get_incremental_source(table_name):
+                self._sync_changes(plan)
+            elif use_row_hash:
+                self._sync_changed_rows(plan)
+            elif partitions > 1:
+                if not self._sync_partitioned(plan, partitions):
+                    return False
+            else:
+                self._sync_serial(plan)
+            
+            synced_rows = plan['synced_rows']
+            
+            # Upserts never remove rows; Change Tracking already applied its deletes
+            if (sync_mode == 'incremental' and self.config.get_propagate_deletes(table_name)
+                    and self.config.get_incremental_source(table_name) != 'change_tracking'):
+                self._propagate_deletes(plan)
+            
+            # Advance the watermark only after the last batch is committed
+            if sync_mode == 'incremental':
+                self._commit_watermark(plan)
+            
+            self._save_batch_size(plan)
+            
+            elapsed = time.monotonic() - start
+            rows_per_second = synced_rows / elapsed if elapsed > 0 else 0.0
+            self.table_stats[table_name] = {'rows': synced_rows, 'rows_per_second': rows_per_second}
+            if plan['stage_stats']:
+                stages = ', '.join(str(stats) for stats in plan['stage_stats'].values())
+                self.logger.info(f"Table {table_name}: Stages: {stages}")
+            self.logger.info(f"Table {table_name}: Sync completed ({synced_rows} rows, "
+                             f"{rows_per_second:.0f} rows/s, {load_strategy})")
+            return True
             
+        except Exception as e:
+            self.logger.error(f"Failed to sync table {table_name}: {e}")
+            return False
+    
+    def _sync_serial(self, plan: dict):
+        """Sync the whole table in one keyset loop, resuming after the last committed key"""
+        table_name = plan['table_name']
+        
+        # Resume after the last committed key if a previous incremental run stopped mid-table
+        last_key = None
+        if plan['sync_mode'] == 'incremental':
+            last_key = self.sync_tracker.get_resume_key(table_name)
+            if last_key is not None:
+                self.logger.info(f"Table {table_name}: Resuming after {self.config.get_primary_key(table_name)} {last_key}")
+            on_commit = lambda key: self.sync_tracker.set_resume_key(table_name, key)
+        else:
+            self.sync_tracker.clear_resume_key(table_name)
+            on_commit = None
+        
+        # The incremental resume key is dropped together with the watermark update
+        self._sync_key_range(plan, last_key, on_commit=on_commit)
+    
+    def _sync_key_range(self, plan: dict, last_key, upper_key=None, on_commit=None):
+        """
+        Copy rows with last_key < primary key <= upper_key in keyset batches
+        
+        Fetching, cleaning and writing run as pipeline stages, so the next
+        batch is read from MSSQL while the previous one is written to MariaDB.
+        
+        Args:
+            plan: Table sync plan built by sync_table_data
+            last_key: Exclusive lower bound (None to start at the first row)
+            upper_key: Inclusive upper bound (None for no limit)
+            on_commit: Called with the last key of every committed batch
+        """
+        table_name = plan['table_name']
+        key_index = plan['key_index']
+        rate_limiter = plan['rate_limiter']
+        batch_controller = plan['batch_controller']
+        # The fetch stage borrows this thread's reader, so the persistent connection is
+        # reused across ranges and polls (this thread does not read MSSQL meanwhile)
+        reader = self.source_reader
+        
+        def fetch_batches():
+            if reader.streams:
+                yield from stream_batches()
+                return
+            seek_key = last_key
             while True:
-                batch_data = self._fetch_batch_data(table_name, original_columns, offset, batch_size)
-                
+                batch_size = batch_controller.size
+                fetch_start = time.monotonic()
+                batch_data = self._fetch_batch_data(table_name, plan['columns'], plan['column_types'],
+                                                    seek_key, batch_size, upper_key, reader)
                 if not batch_data:
                     break
+                batch_controller.record_fetch(len(batch_data), time.monotonic() - fetch_start,
+                                              _estimate_batch_row_bytes(batch_data))
                 
-                clean_batch = self._clean_batch_data(batch_data, len(renamed_columns))
+                # Rows come back ordered by primary key, so the last row is the next seek point
+                seek_key = batch_data[-1][key_index]
+                yield batch_data, seek_key
                 
-                if clean_batch:
-                    cursor.executemany(sql_template, clean_batch)
-                    self.mariadb_conn.commit()
-                    synced_rows += len(clean_batch)
+                if len(batch_data) < batch_size:
+                    break
+        
+        def stream_batches():
+            # One ordered query over the whole range, cut into batches as rows arrive;
+            # query errors propagate instead of ending the range early
+            query = self._build_batch_query(table_name, plan['columns'], last_key, upper_key=upper_key,
+                                            column_types=plan['column_types'], reader=reader)
+            rows = reader.stream(query, plan['column_types'])
+            try:
+                while True:
+                    batch_size = batch_controller.size
+                    fetch_start = time.monotonic()
+                    batch_data = list(islice(rows, batch_size))
+                    if not batch_data:
+                        break
+                    batch_controller.record_fetch(len(batch_data), time.monotonic() - fetch_start,
+                                                  _estimate_batch_row_bytes(batch_data))
+                    yield batch_data, batch_data[-1][key_index]
                     
-                    self._log_progress(table_name, synced_rows, total_rows)
+                    if len(batch_data) < batch_size:
+                        break
+            finally:
+                rows.close()
+        
+        def transform(item):
+            batch_data, batch_key = item
+            if plan['column_transform'] is not None:
+                return self._clean_column_batch(table_name, batch_data, plan['expected_cols'],
+                                                plan['column_transform']), batch_key
+            return self._clean_batch_data(table_name, batch_data, plan['expected_cols'], plan['transform']), batch_key
+        
+        writer = self._create_writer(plan)
+        
+        def load(item):
+            clean_batch, batch_key = item
+            start = time.monotonic()
+            
+            committed_key = writer.write(clean_batch, batch_key)
+            batch_controller.record_write(len(clean_batch), time.monotonic() - start)
+            self._track_watermark(plan, clean_batch)
+            
+            if clean_batch:
+                with plan['lock']:
+                    plan['synced_rows'] += len(clean_batch)
+                    synced_rows = plan['synced_rows']
+                self._log_progress(table_name, synced_rows, plan['total_rows'])
+            
+            if on_commit and committed_key is not None:
+                on_commit(committed_key)
+            
+            rate_limiter.wait(len(clean_batch), time.monotonic() - start)
+        
+        try:
+            stage_stats = run_pipeline(fetch_batches(), transform, load, self.config.sync_config['pipeline_depth'])
+            
+            committed_key = writer.flush()
+            if on_commit and committed_key is not None:
+                on_commit(committed_key)
+        finally:
+            writer.close()
+        
+        with plan['lock']:
+            for name, stats in stage_stats.items():
+                plan['stage_stats'].setdefault(name, StageStats(name)).merge(stats)
+    
+    def _sync_changed_rows(self, plan: dict):
+        """Upsert only rows whose source checksum differs from the checksum stored at their last write"""
+        table_name = plan['table_name']
+        primary_key = self.config.get_primary_key(table_name)
+        batch_size = plan['batch_size']
+        page_size = batch_size * 10
+        condition = self._build_sync_condition(table_name)
+        
+        store = RowHashStore(self.mariadb_conn)
+        store.ensure_table()
+        if not self.sync_tracker.has_row_hashes(table_name):
+            # No baseline yet (first run or forced full sync): every row is written once
+            store.clear(table_name)
+            self.mariadb_conn.commit()
+        
+        writer = self._create_writer(plan)
+        last_key = None
+        scanned_rows = 0
+        
+        try:
+            while True:
+                query = build_source_hash_query(table_name, primary_key, plan['columns'], page_size, last_key, condition)
+                hashes = self.source_reader.execute(query, ['bigint', 'int'])
+                if not hashes:
+                    break
                 
-                offset += batch_size
+                scanned_rows += len(hashes)
+                stored = store.load_range(table_name, hashes[0][0], hashes[-1][0])
+                changed = find_changed_keys(hashes, stored)
                 
-                if len(batch_data) < batch_size:
+                for start in range(0, len(changed), batch_size):
+                    changed_batch = changed[start:start + batch_size]
+                    batch_data = self._fetch_rows_by_keys(plan, [pk for pk, _ in changed_batch])
+                    clean_batch = self._clean_batch_data(table_name, batch_data, plan['expected_cols'], plan['transform'])
+                    
+                    # Only rows actually written get their checksum stored; missing rows are retried next run
+                    written_keys = {row[plan['key_index']] for row in clean_batch}
+                    store.save(table_name, [(pk, row_hash) for pk, row_hash in changed_batch if pk in written_keys])
+                    
+                    # Checksums are saved first so the writer's commit covers rows and checksums together
+                    writer.write(clean_batch, changed_batch[-1][0])
+                    self._track_watermark(plan, clean_batch)
+                    writer.flush()
+                    
+                    plan['synced_rows'] += len(clean_batch)
+                
+                self.logger.info(f"Table {table_name}: Checked {scanned_rows}/{plan['total_rows'] or 'unknown'} rows, "
+                                 f"{plan['synced_rows']} changed")
+                last_key = hashes[-1][0]
+                if len(hashes) < page_size:
                     break
+        finally:
+            writer.close()
+        
+        self.sync_tracker.set_row_hashes(table_name)
+        self.logger.info(f"Table {table_name}: {plan['synced_rows']} of {scanned_rows} rows changed (row hash)")
+    
+    def _sync_changes(self, plan: dict):
+        """Apply inserts, updates and deletes recorded since the stored Change Tracking/rowversion version"""
+        table_name = plan['table_name']
+        primary_key = self.config.get_primary_key(table_name)
+        source = create_change_source(self.config, self.source_reader, table_name)
+        
+        # Read the version first so changes made during this run are picked up next time
+        current_version = source.current_version(table_name)
+        last_version = self.sync_tracker.get_change_version(table_name)
+        
+        if last_version is None or last_version < source.min_valid_version(table_name):
+            self.logger.warning(f"Table {table_name}: No valid {source.name} version stored, copying all rows "
+                                f"before switching to change based sync")
+            self._sync_serial(plan)
+            self.sync_tracker.set_change_version(table_name, current_version)
+            return
+        
+        target_key = plan['target_columns'][plan['key_index']]
+        writer = self._create_writer(plan)
+        deleted_rows = 0
+        
+        try:
+            changes_iter = source.iter_changes(
+                table_name, primary_key, plan['columns'], plan['column_types'], last_version, current_version,
+                plan['batch_size'], self.config.get_table_condition(table_name) or ''
+            )
+            for changes in changes_iter:
+                rows = [values for _, _, values in changes if values is not None]
+                deleted_keys = [key for _, key, values in changes if values is None]
                 
-                time.sleep(0.1)  # Rate limiting
-            
+                clean_batch = self._clean_batch_data(table_name, rows, plan['expected_cols'], plan['transform'])
+                writer.write(clean_batch, changes[-1][1])
+                self._track_watermark(plan, clean_batch)
+                if deleted_keys:
+                    self._delete_target_rows(plan['target_table'], target_key, deleted_keys)
+                writer.flush()
+                
+                plan['synced_rows'] += len(clean_batch)
+                deleted_rows += len(deleted_keys)
+        finally:
+            writer.close()
+        
+        self.sync_tracker.set_change_version(table_name, current_version)
+        self.logger.info(f"Table {table_name}: Applied {plan['synced_rows']} upserts and {deleted_rows} deletes "
+                         f"({source.name} version {last_version} -> {current_version})")
+    
+    def _propagate_deletes(self, plan: dict) -> int:
+        """Delete MariaDB rows whose primary key no longer exists in MSSQL, capped by max_deletes"""
+        table_name = plan['table_name']
+        primary_key = self.config.get_primary_key(table_name)
+        target_key = plan['target_columns'][plan['key_index']]
+        key_type = plan['column_types'][plan['key_index']].lower().split('(')[0]
+        if key_type not in ('int', 'bigint', 'smallint', 'tinyint'):
+            self.logger.warning(f"Table {table_name}: Delete propagation needs an integer primary key, skipping")
+            return 0
+        
+        orphans = find_orphan_ranges(
+            self.source_reader, self.mariadb_conn, plan['target_table'], primary_key, target_key,
+            self.config.get_table_condition(table_name) or ''
+        )
+        if not orphans:
+            return 0
+        
+        orphan_rows = count_keys(orphans)
+        max_deletes = self.config.sync_config['max_deletes']
+        if max_deletes and orphan_rows > max_deletes:
+            self.logger.warning(f"Table {table_name}: {orphan_rows} rows missing in MSSQL exceed the delete limit "
+                                f"({max_deletes}), no rows deleted - check the source or raise SYNC_MAX_DELETES")
+            return 0
+        
+        cursor = self.mariadb_conn.cursor()
+        try:
+            for start in range(0, len(orphans), 500):
+                ranges = ' OR '.join(f"`{target_key}` BETWEEN {lower} AND {upper}"
+                                     for lower, upper in orphans[start:start + 500])
+                cursor.execute(f"DELETE FROM `{plan['target_table']}` WHERE {ranges}")
+            self.mariadb_conn.commit()
+        finally:
+            cursor.close()
+        
+        self.logger.info(f"Table {table_name}: Deleted {orphan_rows} rows removed in MSSQL ({len(orphans)} key ranges)")
+        return orphan_rows
+    
+    def _delete_target_rows(self, target_table: str, key_column: str, keys: list):
+        """Delete rows by primary key from a MariaDB table (caller commits)"""
+        cursor = self.mariadb_conn.cursor()
+        try:
+            placeholders = ', '.join(['%s'] * len(keys))
+            cursor.execute(f"DELETE FROM `{target_table}` WHERE `{key_column}` IN ({placeholders})", list(keys))
+        finally:
+            cursor.close()
+    
+    def _fetch_rows_by_keys(self, plan: dict, keys: list) -> List[tuple]:
+        """Fetch full source rows for a list of primary keys"""
+        table_name = plan['table_name']
+        primary_key = self.config.get_primary_key(table_name)
+        key_list = ', '.join(format_sql_literal(key) for key in keys)
+        select_columns = self.source_reader.select_list(plan['columns'], plan['column_types'])
+        query = (f"SELECT {select_columns} FROM {table_name} "
+                 f"WHERE {primary_key} IN ({key_list}) ORDER BY {primary_key}")
+        return self.source_reader.execute(query, plan['column_types'])
+    
+    def get_batch_size(self, table_name: str) -> int:
+        """Get the batch size the next sync of a table starts with (tuned size from the sync state)"""
+        sync_config = self.config.sync_config
+        batch_size = self.sync_tracker.get_batch_size(table_name) or sync_config['batch_size']
+        return int(min(sync_config['max_batch_size'], max(sync_config['min_batch_size'], batch_size)))
+    
+    def _create_batch_controller(self, table_name: str) -> BatchSizeController:
+        """Create the batch size controller of a table sync"""
+        sync_config = self.config.sync_config
+        return BatchSizeController(self.get_batch_size(table_name), sync_config['min_batch_size'],
+                                   sync_config['max_batch_size'], sync_config['batch_target_seconds'])
+    
+    def _save_batch_size(self, plan: dict):
+        """Store the batch size a table settled on for the next sync"""
+        controller = plan['batch_controller']
+        if not controller.adaptive or controller.size == controller.initial_size:
+            return
+        self.sync_tracker.set_batch_size(plan['table_name'], controller.size)
+        self.logger.info(f"Table {plan['table_name']}: batch size {controller.initial_size} -> {controller.size}")
+    
+    def _create_writer(self, plan: dict) -> TargetWriter:
+        """Create the MariaDB writer for this thread's connection"""
+        table_name = plan['table_name']
+        target_table = plan['target_table']
+        commit_rows = self.config.sync_config['commit_rows']
+        
+        if plan['load_strategy'] == 'multirow':
+            update_clause = None
+            if plan['sync_mode'] == 'incremental':
+                update_clause = self._build_update_clause(table_name, plan['target_columns'])
+            return MultiRowWriter(self.mariadb_conn, target_table, plan['target_columns'],
+                                  self._get_max_allowed_packet(), update_clause, commit_rows)
+        
+        writer = ExecuteManyWriter(self.mariadb_conn, target_table, plan['target_columns'],
+                                   plan['sql_template'], commit_rows)
+        
+        if plan['load_strategy'] == 'bulk':
+            return BulkLoadWriter(self.mariadb_conn, target_table, plan['target_columns'], writer,
+                                  self.config.sync_config['bulk_rows'])
+        return writer
+    
+    def _get_max_allowed_packet(self) -> int:
+        """Get the server's max_allowed_packet (cached, used to size multi-row statements)"""
+        if self._max_allowed_packet is None:
+            cursor = self.mariadb_conn.cursor()
+            cursor.execute("SELECT @@max_allowed_packet")
+            self._max_allowed_packet = int(cursor.fetchone()[0])
             cursor.close()
+        return self._max_allowed_packet
+    
+    def _apply_session_profile(self, connection):
+        """Apply the configured session tuning statements to a new sync connection"""
+        profile = self.config.sync_config['session_profile']
+        statements = self.config.get_session_profile(profile)
+        
+        cursor = connection.cursor()
+        for statement in statements:
+            try:
+                cursor.execute(statement)
+            except MySQLError as e:
+                self.logger.warning(f"Session profile '{profile}': could not apply '{statement}': {e}")
+        cursor.close()
+    
+    def _ensure_secondary_indexes(self, table_name: str, target_table: Optional[str] = None):
+        """Create configured secondary indexes that are missing (after loading, so inserts stay cheap)"""
+        target_table = target_table or table_name
+        indexes = self.config.get_secondary_indexes(table_name)
+        if not indexes:
+            return
+        
+        try:
+            cursor = self.mariadb_conn.cursor()
+            cursor.execute(f"SHOW INDEX FROM `{target_table}`")
+            existing = {row[2] for row in cursor.fetchall()}
             
-            # Update last sync timestamp for incremental sync
-            if sync_mode == 'incremental' and synced_rows > 0:
-                self._update_last_sync_timestamp(table_name)
+            additions = []
+            for index_columns in indexes:
+                if isinstance(index_columns, str):
+                    index_columns = [index_columns]
+                index_name = 'idx_' + '_'.join(index_columns)
+                if index_name not in existing:
+                    additions.append(f"ADD INDEX `{index_name}` (`{'`, `'.join(index_columns)}`)")
+            
+            if additions:
+                cursor.execute(f"ALTER TABLE `{target_table}` {', '.join(additions)}")
+                self.logger.info(f"Table {table_name}: Created {len(additions)} secondary indexes")
+            cursor.close()
             
-            self.logger.info(f"Table {table_name}: Sync completed ({synced_rows} rows)")
+        except MySQLError as e:
+            self.logger.warning(f"Could not create secondary indexes for {table_name}: {e}")
+    
+    def _get_key_bounds(self, plan: dict) -> Tuple[Optional[int], Optional[int]]:
+        """Get MIN/MAX of the primary key for rows matching the sync condition"""
+        table_name = plan['table_name']
+        primary_key = self.config.get_primary_key(table_name)
+        key_type = plan['column_types'][plan['key_index']]
+        
+        query = self._apply_sync_condition(table_name, f"SELECT MIN({primary_key}), MAX({primary_key}) FROM {table_name}")
+        results = self.source_reader.execute(query, [key_type, key_type])
+        
+        if results and len(results[0]) == 2:
+            return results[0][0], results[0][1]
+        return None, None
+    
+    def _plan_chunks(self, plan: dict, partitions: int) -> Optional[List[dict]]:
+        """Split the primary key range into chunks, reusing saved chunk progress when resuming"""
+        table_name = plan['table_name']
+        
+        if plan['sync_mode'] == 'incremental':
+            saved_chunks = self.sync_tracker.get_chunks(table_name)
+            if saved_chunks and len(saved_chunks) == partitions:
+                pending = sum(1 for chunk in saved_chunks if not chunk.get('done'))
+                self.logger.info(f"Table {table_name}: Resuming {pending}/{partitions} unfinished chunks")
+                return saved_chunks
+        
+        min_key, max_key = self._get_key_bounds(plan)
+        if min_key is None or max_key is None:
+            return []
+        
+        if not isinstance(min_key, int) or not isinstance(max_key, int):
+            self.logger.warning(f"Table {table_name}: range partitioning needs an integer primary key, syncing serially")
+            return None
+        
+        # A range that fits a few batches is not worth the extra connections of chunk workers
+        if max_key - min_key + 1 <= partitions * plan['batch_size']:
+            self.logger.debug(f"Table {table_name}: key range {min_key}-{max_key} is small, syncing serially")
+            return None
+        
+        step = max(1, -(-(max_key - min_key + 1) // partitions))
+        chunks = []
+        for lower in range(min_key, max_key + 1, step):
+            upper = min(lower + step - 1, max_key)
+            chunks.append({'lo': lower, 'hi': upper, 'last_key': lower - 1, 'done': False})
+        
+        if plan['sync_mode'] == 'incremental':
+            self.sync_tracker.set_chunks(table_name, chunks)
+        return chunks
+    
+    def _sync_partitioned(self, plan: dict, partitions: int) -> bool:
+        """Sync primary key range chunks of one table concurrently"""
+        table_name = plan['table_name']
+        chunks = self._plan_chunks(plan, partitions)
+        
+        if chunks is None:
+            self._sync_serial(plan)
             return True
+        
+        pending = [index for index, chunk in enumerate(chunks) if not chunk.get('done')]
+        max_workers = max(1, min(self.config.sync_config['partition_workers'], len(pending)))
+        self.logger.info(f"Table {table_name}: Syncing {len(pending)} key range chunks with {max_workers} workers")
+        
+        failed = []
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=f"{table_name}-chunk") as executor:
+            futures = {executor.submit(self._sync_chunk_worker, plan, chunks, index): index for index in pending}
+            for future in as_completed(futures):
+                if not future.result():
+                    failed.append(futures[future])
+        
+        if failed:
+            self.logger.error(f"Table {table_name}: {len(failed)} chunks failed, they will be retried on the next run")
+            return False
+        
+        # Chunk progress is dropped together with the watermark update
+        return True
+    
+    def _sync_chunk_worker(self, plan: dict, chunks: List[dict], index: int) -> bool:
+        """Sync one key range chunk with its own connections, retrying from the last committed key"""
+        table_name = plan['table_name']
+        chunk = chunks[index]
+        persist = plan['sync_mode'] == 'incremental'
+        max_retries = self.config.sync_config['max_retries']
+        
+        def on_commit(key):
+            chunk['last_key'] = key
+            if persist:
+                self.sync_tracker.update_chunk(table_name, index, last_key=key)
+        
+        try:
+            for attempt in range(1, max_retries + 1):
+                try:
+                    if self.mariadb_conn is None and not self.connect_mariadb():
+                        raise RuntimeError("MariaDB connection failed")
+                    
+                    self._sync_key_range(plan, chunk['last_key'], chunk['hi'], on_commit)
+                    chunk['done'] = True
+                    if persist:
+                        self.sync_tracker.update_chunk(table_name, index, done=True)
+                    return True
+                    
+                except Exception as e:
+                    self.logger.warning(f"Table {table_name}: chunk {index + 1} ({chunk['lo']}-{chunk['hi']}) "
+                                        f"attempt {attempt}/{max_retries} failed: {e}")
+                    self._close_thread_connections()
             
-        except Exception as e:
-            self.logger.error(f"Failed to sync table {table_name}: {e}")
             return False
+        finally:
+            self._close_thread_connections()
     
     def _get_column_mappings(self, table_name: str, columns: List[Tuple[str, str]]) -> Tuple[List[str], List[str]]:
         """Get original and renamed column mappings"""
@@ -370,11 +1102,7 @@ class DatabaseSyncer:
     def _build_upsert_sql(self, table_name: str, columns: List[str]) -> str:
         """Build INSERT...ON DUPLICATE KEY UPDATE SQL statement"""
         placeholders = ', '.join(['%s'] * len(columns))
-        primary_key = self.config.get_primary_key(table_name)
-        
-        # Build update clause (exclude primary key)
-        update_columns = [col for col in columns if col != primary_key]
-        update_clause = ', '.join([f"`{col}` = VALUES(`{col}`)" for col in update_columns])
+        update_clause = self._build_update_clause(table_name, columns)
         
         return f"""
         INSERT INTO `{table_name}` (`{'`, `'.join(columns)}`) 
@@ -382,41 +1110,99 @@ class DatabaseSyncer:
         ON DUPLICATE KEY UPDATE {update_clause}
         """
     
-    def _update_last_sync_timestamp(self, table_name: str):
-        """Update last sync timestamp for incremental sync"""
-        timestamp_column = self.config.get_timestamp_column(table_name)
-        if not timestamp_column:
+    def _build_update_clause(self, table_name: str, columns: List[str]) -> str:
+        """Build the ON DUPLICATE KEY UPDATE assignments (all columns except the primary key)"""
+        primary_key = self.config.get_primary_key(table_name)
+        update_columns = [col for col in columns if col != primary_key]
+        return ', '.join([f"`{col}` = VALUES(`{col}`)" for col in update_columns])
+    
+    def _track_watermark(self, plan: dict, rows: List[tuple]):
+        """Keep the highest (timestamp, primary key) of written rows, comparing typed datetimes"""
+        timestamp_index = plan['timestamp_index']
+        if timestamp_index is None or not rows:
             return
         
-        try:
-            # Get the latest timestamp from the synced data
-            query = f"SELECT MAX({timestamp_column}) FROM {table_name}"
-            results = self.execute_mssql_query(query)
-            
-            if results and results[0] and results[0][0]:
-                latest_timestamp = results[0][0]
-                self.sync_tracker.set_last_sync(table_name, latest_timestamp)
-                self.logger.info(f"Updated last sync timestamp for {table_name}: {latest_timestamp}")
-        except Exception as e:
-            self.logger.warning(f"Could not update last sync timestamp for {table_name}: {e}")
+        key_index = plan['key_index']
+        highest = None
+        for row in rows:
+            timestamp = row[timestamp_index]
+            if isinstance(timestamp, str):
+                try:
+                    timestamp = parse_mssql_datetime(timestamp)
+                except ValueError:
+                    continue
+            if timestamp is None:
+                continue
+            
+            candidate = (timestamp, row[key_index])
+            if highest is None or candidate > highest:
+                highest = candidate
+        
+        if highest is not None:
+            with plan['lock']:
+                if plan['watermark'] is None or highest > plan['watermark']:
+                    plan['watermark'] = highest
+    
+    def _commit_watermark(self, plan: dict):
+        """Advance the watermark to the highest synced row and drop resume points in one tracker save"""
+        table_name = plan['table_name']
+        if plan['watermark'] is None:
+            self.sync_tracker.complete_sync(table_name)
+            return
+        
+        timestamp, key = plan['watermark']
+        if isinstance(timestamp, datetime):
+            # Keep millisecond precision for MSSQL literals
+            timestamp = timestamp.strftime('%Y-%m-%dT%H:%M:%S.%f')[:-3]
+        else:
+            timestamp = str(timestamp)
+        
+        self.sync_tracker.complete_sync(table_name, timestamp, key)
+        self.logger.info(f"Updated last sync watermark for {table_name}: {timestamp} "
+                         f"({self.config.get_primary_key(table_name)} {key})")
     
-    def _fetch_batch_data(self, table_name: str, columns: List[str], offset: int, batch_size: int) -> List[List[str]]:
-        """Fetch batch of data from MSSQL with column filtering"""
-        # Build SELECT clause with proper column mapping
+    def _get_key_index(self, table_name: str, original_columns: List[str]) -> Optional[int]:
+        """Get position of the primary key in the selected columns (needed for keyset pagination)"""
+        primary_key = self.config.get_primary_key(table_name)
+        info = self.catalog.get(table_name)
+        if info is not None and info.primary_key and [col.lower() for col in info.primary_key] != [primary_key.lower()]:
+            self.logger.warning(f"Table {table_name}: configured primary key {primary_key} differs from "
+                                f"the MSSQL primary key ({', '.join(info.primary_key)})")
+        
+        for i, col_name in enumerate(original_columns):
+            if col_name.lower() == primary_key.lower():
+                return i
+        
+        self.logger.error(f"Table {table_name}: primary key {primary_key} must be included in synced columns")
+        return None
+    
+    def _fetch_batch_data(self, table_name: str, columns: List[str], column_types: List[str],
+                          last_key, batch_size: int, upper_key=None, reader=None) -> List[tuple]:
+        """Fetch the next batch after last_key from MSSQL using keyset pagination (with reader, default this thread's)"""
+        reader = reader or self.source_reader
+        query = self._build_batch_query(table_name, columns, last_key, batch_size, upper_key, column_types, reader)
+        return reader.execute(query, column_types)
+    
+    def _build_batch_query(self, table_name: str, columns: List[str], last_key,
+                           batch_size: Optional[int] = None, upper_key=None,
+                           column_types: Optional[List[str]] = None, reader=None) -> str:
+        """Build the query for rows with last_key < primary key <= upper_key ordered by key (all rows without batch_size)"""
+        # Build SELECT clause with proper column mapping (in the reader's form for the column types)
         original_columns, _ = self._get_column_mappings(table_name, [(col, '') for col in columns])
-        select_columns = ', '.join(original_columns)
+        select_columns = (reader or self.source_reader).select_list(original_columns, column_types)
+        primary_key = self.config.get_primary_key(table_name)
         
-        base_query = f"SELECT {select_columns} FROM {table_name}"
+        top = f"TOP {batch_size} " if batch_size else ''
+        query = f"SELECT {top}{select_columns} FROM {table_name}"
+        query = self._apply_sync_condition(table_name, query)
         
-        if offset == 0:
-            query = f"SELECT TOP {batch_size} {select_columns} FROM {table_name}"
-            query = self._apply_sync_condition(table_name, query)
-        else:
-            filtered_query = self._apply_sync_condition(table_name, base_query)
-            primary_key = self.config.get_primary_key(table_name)
-            query = f"{filtered_query} ORDER BY {primary_key} OFFSET {offset} ROWS FETCH NEXT {batch_size} ROWS ONLY"
+        # Seek past the previous page instead of OFFSET so every page costs the same
+        if last_key is not None:
+            query = self._add_condition(query, f"{primary_key} > {format_sql_literal(last_key)}")
+        if upper_key is not None:
+            query = self._add_condition(query, f"{primary_key} <= {format_sql_literal(upper_key)}")
         
-        return self.execute_mssql_query(query)
+        return f"{query} ORDER BY {primary_key}"
     
     def _build_sync_condition(self, table_name: str) -> str:
         """Build sync condition based on sync mode and configuration"""
@@ -427,7 +1213,7 @@ class DatabaseSyncer:
             timestamp_column = self.config.get_timestamp_column(table_name)
             if timestamp_column:
                 return self.sync_tracker.get_incremental_condition(
-                    table_name, timestamp_column, base_condition
+                    table_name, timestamp_column, base_condition, self.config.get_primary_key(table_name)
                 )
         
         return base_condition or ""
@@ -437,31 +1223,48 @@ class DatabaseSyncer:
         condition = self._build_sync_condition(table_name)
         
         if condition:
-            if 'WHERE' in base_query.upper():
-                return f"{base_query} AND {condition}"
-            else:
-                return f"{base_query} WHERE {condition}"
+            return self._add_condition(base_query, condition)
         
         return base_query
     
-    def _clean_batch_data(self, batch_data: List[List[str]], expected_cols: int) -> List[List]:
-        """Clean and validate batch data"""
-        clean_batch = []
-        for row in batch_data:
-            clean_row = [clean_value(val) for val in row]
-            if len(clean_row) == expected_cols:
-                clean_batch.append(clean_row)
+    def _add_condition(self, query: str, condition: str) -> str:
+        """Append a condition to a query's WHERE clause"""
+        if 'WHERE' in query.upper():
+            return f"{query} AND ({condition})"
+        else:
+            return f"{query} WHERE ({condition})"
+    
+    def _clean_batch_data(self, table_name: str, batch_data: List[tuple], expected_cols: int,
+                          transform: Optional[Callable[[tuple], tuple]] = None) -> List[tuple]:
+        """Clean and validate batch data with the table's row transform (values are already typed by the source reader)"""
+        transform = transform or clean_typed_row
+        clean_batch = [transform(row) for row in batch_data if len(row) == expected_cols]
+        
+        dropped = len(batch_data) - len(clean_batch)
+        if dropped:
+            self.logger.warning(f"Table {table_name}: dropped {dropped} rows with wrong column count")
         return clean_batch
     
+    def _clean_column_batch(self, table_name: str, batch_data: List[tuple], expected_cols: int,
+                            column_transform: Callable[[List[tuple]], ColumnBatch]) -> ColumnBatch:
+        """Transpose and clean batch data per column"""
+        rows = [row for row in batch_data if len(row) == expected_cols]
+        
+        dropped = len(batch_data) - len(rows)
+        if dropped:
+            self.logger.warning(f"Table {table_name}: dropped {dropped} rows with wrong column count")
+        return column_transform(rows)
+    
     def _log_progress(self, table_name: str, synced_rows: int, total_rows: int):
         """Log sync progress"""
         if total_rows > 0:
-            progress = (synced_rows / total_rows) * 100
+            # Row counts are estimates unless SYNC_EXACT_ROW_COUNT is set
+            progress = min(synced_rows / total_rows, 1.0) * 100
             self.logger.info(f"Table {table_name}: {synced_rows}/{total_rows} rows ({progress:.1f}%)")
         else:
             self.logger.info(f"Table {table_name}: {synced_rows} rows synced")
     
-    def sync_table(self, table_name: str) -> bool:
+    def sync_table(self, table_name: str, total_rows: Optional[int] = None) -> bool:
         """Sync a single table (structure + data)"""
         self.logger.info(f"Starting sync for table: {table_name}")
         
@@ -476,12 +1279,77 @@ class DatabaseSyncer:
             self.logger.error(f"Could not get structure for table {table_name}")
             return False
         
+        # Full syncs load a shadow table and swap it in, so readers never see a partial table
+        if self.config.get_sync_mode(table_name) == 'full':
+            target_table = f"{table_name}{STAGING_SUFFIX}"
+        else:
+            target_table = table_name
+        
         # Create table in MariaDB
-        if not self.create_mariadb_table(table_name, columns):
+        if not self.create_mariadb_table(table_name, columns, target_table):
             return False
         
         # Sync data
-        return self.sync_table_data(table_name, columns)
+        if not self.sync_table_data(table_name, columns, total_rows, target_table):
+            # Check the MariaDB table again next time in case it was dropped or altered
+            self.schema_cache.invalidate(table_name)
+            if target_table != table_name:
+                self._drop_table(target_table)
+                self.logger.info(f"Table {table_name}: Kept previous data, dropped {target_table}")
+            return False
+        
+        self._ensure_secondary_indexes(table_name, target_table)
+        
+        if target_table != table_name:
+            return self._swap_staging_table(table_name, target_table)
+        return True
+    
+    def _swap_staging_table(self, table_name: str, staging_table: str) -> bool:
+        """Atomically replace the live table with the fully loaded staging table"""
+        old_table = f"{table_name}__old"
+        try:
+            cursor = self.mariadb_conn.cursor()
+            cursor.execute(f"DROP TABLE IF EXISTS `{old_table}`")
+            cursor.execute(f"SHOW TABLES LIKE '{table_name}'")
+            
+            if cursor.fetchone():
+                # One RENAME TABLE statement swaps both names atomically
+                cursor.execute(f"RENAME TABLE `{table_name}` TO `{old_table}`, `{staging_table}` TO `{table_name}`")
+                cursor.execute(f"DROP TABLE IF EXISTS `{old_table}`")
+            else:
+                cursor.execute(f"RENAME TABLE `{staging_table}` TO `{table_name}`")
+            
+            cursor.close()
+            self.logger.info(f"Table {table_name}: Swapped in {staging_table}")
+            return True
+            
+        except MySQLError as e:
+            self.logger.error(f"Failed to swap {staging_table} into {table_name}: {e}")
+            self._drop_table(staging_table)
+            return False
+    
+    def _drop_table(self, table_name: str):
+        """Drop a MariaDB table, logging instead of raising on failure"""
+        try:
+            cursor = self.mariadb_conn.cursor()
+            cursor.execute(f"DROP TABLE IF EXISTS `{table_name}`")
+            cursor.close()
+        except MySQLError as e:
+            self.logger.warning(f"Could not drop table {table_name}: {e}")
+    
+    def _sync_table_worker(self, table_name: str, total_rows: int) -> bool:
+        """Sync one table on a worker thread using that thread's own connections"""
+        start = time.monotonic()
+        
+        if self.mariadb_conn is None and not self.connect_mariadb():
+            success = False
+        else:
+            success = self.sync_table(table_name, total_rows)
+        
+        stats = self.table_stats.setdefault(table_name, {'rows': 0})
+        stats['duration'] = time.monotonic() - start
+        stats['success'] = success
+        return success
     
     def force_full_sync(self, table_name: str = None):
         """Force full sync by clearing last sync timestamps"""
@@ -517,15 +1385,43 @@ class DatabaseSyncer:
             
             success_count = 0
             total_tables = len(tables)
+            self.table_stats = {}
             
-            # Sync each table
-            for i, table_name in enumerate(tables, 1):
-                self.logger.info(f"Processing table {i}/{total_tables}: {table_name}")
-                
-                if self.sync_table(table_name):
-                    success_count += 1
-                else:
-                    self.logger.error(f"Failed to sync table: {table_name}")
+            # Columns, keys and row counts of all tables in one query
+            self.catalog.load(self.source_reader, tables)
+            
+            # Schedule largest tables first so small ones fill in around them
+            row_counts = {table_name: self.get_table_row_count(table_name) for table_name in tables}
+            tables.sort(key=lambda table_name: row_counts[table_name], reverse=True)
+            max_workers = max(1, min(self.config.sync_config['max_workers'], total_tables))
+            self.logger.info(f"Syncing {total_tables} tables with {max_workers} workers (largest first)")
+            
+            if max_workers == 1:
+                for i, table_name in enumerate(tables, 1):
+                    self.logger.info(f"Processing table {i}/{total_tables}: {table_name}")
+                    
+                    if self._sync_table_worker(table_name, row_counts[table_name]):
+                        success_count += 1
+                    else:
+                        self.logger.error(f"Failed to sync table: {table_name}")
+            else:
+                with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='sync') as executor:
+                    futures = {
+                        executor.submit(self._sync_table_worker, table_name, row_counts[table_name]): table_name
+                        for table_name in tables
+                    }
+                    for future in as_completed(futures):
+                        table_name = futures[future]
+                        try:
+                            success = future.result()
+                        except Exception as e:
+                            self.logger.error(f"Worker for table {table_name} crashed: {e}")
+                            success = False
+                        
+                        if success:
+                            success_count += 1
+                        else:
+                            self.logger.error(f"Failed to sync table: {table_name}")
             
             # Summary
             end_time = datetime.now()
@@ -535,14 +1431,105 @@ class DatabaseSyncer:
             self.logger.info(f"Total tables: {total_tables}")
             self.logger.info(f"Successful: {success_count}")
             self.logger.info(f"Failed: {total_tables - success_count}")
+            self._log_table_timings(tables, duration.total_seconds())
             self.logger.info(f"Duration: {duration}")
             
             return success_count == total_tables
             
         finally:
-            if self.mariadb_conn:
-                self.mariadb_conn.close()
-                self.logger.info("MariaDB connection closed")
+            self.close_connections()
+    
+    def reconcile(self, table_name: Optional[str] = None, repair: bool = False) -> bool:
+        """
+        Compare MariaDB tables with MSSQL and optionally repair the differing rows
+        
+        Missing, extra and changed primary keys are logged and written to
+        RECONCILE_REPORT_FILE.
+        
+        Args:
+            table_name: Table to check (None for all configured tables)
+            repair: Upsert missing/changed rows and delete extra rows
+        
+        Returns:
+            True if all tables match (after repair when requested)
+        """
+        self.logger.info("=== Starting Reconcile ===")
+        if not self.connect_mariadb():
+            return False
+        
+        tables = [table_name] if table_name else self.get_table_list()
+        report = {}
+        all_match = True
+        
+        try:
+            for table in tables:
+                columns = self.get_table_structure(table)
+                if not columns:
+                    self.logger.error(f"Table {table}: no columns found")
+                    all_match = False
+                    continue
+                
+                reconciler = TableReconciler(
+                    self, table, columns,
+                    fanout=self.config.sync_config['reconcile_fanout'],
+                    leaf_rows=self.config.sync_config['reconcile_leaf_rows']
+                )
+                start = time.monotonic()
+                result = reconciler.diff()
+                if result is None:
+                    all_match = False
+                    continue
+                
+                differences = sum(len(keys) for keys in result.values())
+                self.logger.info(f"Table {table}: {len(result['missing'])} missing, {len(result['extra'])} extra, "
+                                 f"{len(result['changed'])} changed ({reconciler.round_trips} queries, "
+                                 f"{time.monotonic() - start:.1f}s)")
+                for kind, keys in result.items():
+                    if keys:
+                        self.logger.debug(f"Table {table}: {kind} IDs {keys[:20]}{' ...' if len(keys) > 20 else ''}")
+                
+                if differences and repair:
+                    renamed_columns = reconciler.target_columns
+                    writer = ExecuteManyWriter(
+                        self.mariadb_conn, table, renamed_columns,
+                        self._build_upsert_sql(table, renamed_columns)
+                    )
+                    try:
+                        repaired = reconciler.repair(result, writer, self.config.sync_config['batch_size'])
+                        self.mariadb_conn.commit()
+                    finally:
+                        writer.close()
+                    self.logger.info(f"Table {table}: repaired {repaired} rows")
+                    result['repaired'] = True
+                elif differences:
+                    all_match = False
+                
+                report[table] = result
+            
+            with open(RECONCILE_REPORT_FILE, 'w') as f:
+                json.dump(report, f, indent=2, default=str)
+            self.logger.info(f"Reconcile report written to {RECONCILE_REPORT_FILE}")
+            return all_match
+            
+        except Exception as e:
+            self.logger.error(f"Reconcile failed: {e}")
+            return False
+        finally:
+            self.close_connections()
+    
+    def _log_table_timings(self, tables: List[str], wall_seconds: float):
+        """Log per-table durations and how much the parallel run saved"""
+        table_seconds = 0.0
+        for table_name in tables:
+            stats = self.table_stats.get(table_name, {})
+            seconds = stats.get('duration', 0.0)
+            table_seconds += seconds
+            status = 'OK' if stats.get('success') else 'FAILED'
+            self.logger.info(f"  {table_name}: {status}, {stats.get('rows', 0)} rows in {seconds:.1f}s")
+        
+        if wall_seconds > 0:
+            self.logger.info(f"Sum of table times: {table_seconds:.1f}s, wall clock: {wall_seconds:.1f}s "
+                             f"(speedup {table_seconds / wall_seconds:.2f}x)")
 
 def main():
     """Main entry point"""
@@ -553,16 +1540,34 @@ def main():
                        help='Force full sync (ignore incremental timestamps)')
     parser.add_argument('--table', type=str, 
                        help='Sync specific table only')
+    parser.add_argument('--daemon', action='store_true',
+                       help='Keep running and poll tables continuously (stop with SIGTERM)')
+    parser.add_argument('--reconcile', action='store_true',
+                       help='Compare MariaDB with MSSQL and report missing/extra/changed IDs')
+    parser.add_argument('--repair', action='store_true',
+                       help='With --reconcile: rewrite only the differing rows')
+    parser.add_argument('--exact-count', action='store_true',
+                       help='Count rows with COUNT(*) for progress instead of estimating')
     
     args = parser.parse_args()
     syncer = DatabaseSyncer()
+    if args.exact_count:
+        syncer.config.sync_config['exact_row_count'] = True
     
     try:
-        if args.table:
+        if args.daemon:
+            if args.force_full:
+                syncer.force_full_sync(args.table)
+            success = SyncDaemon(syncer, [args.table] if args.table else None).run()
+        elif args.reconcile:
+            success = syncer.reconcile(args.table, repair=args.repair)
+        elif args.table:
             # Sync specific table
             if syncer.connect_mariadb():
-                success = syncer.sync_table(args.table)
-                syncer.mariadb_conn.close()
+                try:
+                    success = syncer.sync_table(args.table)
+                finally:
+                    syncer.close_connections()
             else:
                 success = False
         else:
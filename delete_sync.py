@@ -0,0 +1,111 @@
+"""
+Delete propagation for incremental tables
+
+Both sides return their primary keys compressed to sorted ranges of
+consecutive IDs (gaps and islands: ID - ROW_NUMBER() is constant within an
+island), so a mostly dense table of millions of rows transfers a handful of
+ranges instead of every ID. Target ranges minus source ranges are the orphans
+that were deleted in MSSQL.
+"""
+from typing import List, Optional, Tuple
+
+KeyRange = Tuple[int, int]
+
+
+def _ranges_query(table: str, key: str, lower: int, upper: int, condition: str = '') -> str:
+    where = f"{key} BETWEEN {int(lower)} AND {int(upper)}"
+    if condition:
+        where += f" AND ({condition})"
+    return (f"SELECT MIN({key}), MAX({key}) FROM ("
+            f"SELECT {key}, {key} - ROW_NUMBER() OVER (ORDER BY {key}) AS grp FROM {table} WHERE {where}"
+            f") AS islands GROUP BY grp ORDER BY MIN({key})")
+
+
+def build_source_ranges_query(table_name: str, primary_key: str, lower: int, upper: int, condition: str = '') -> str:
+    """Build the MSSQL query returning key ranges of rows in [lower, upper]"""
+    return _ranges_query(table_name, primary_key, lower, upper, condition)
+
+
+def build_target_ranges_query(table_name: str, key_column: str, lower: int, upper: int) -> str:
+    """Build the MariaDB query returning key ranges of rows in [lower, upper]"""
+    return _ranges_query(f"`{table_name}`", f"`{key_column}`", lower, upper)
+
+
+def subtract_ranges(target_ranges: List[KeyRange], source_ranges: List[KeyRange]) -> List[KeyRange]:
+    """
+    Get the parts of target ranges not covered by any source range
+    
+    Both lists must be sorted and non-overlapping.
+    """
+    orphans = []
+    source_index = 0
+    
+    for lower, upper in target_ranges:
+        start = lower
+        while source_index < len(source_ranges) and source_ranges[source_index][1] < start:
+            source_index += 1
+        
+        index = source_index
+        while start <= upper and index < len(source_ranges) and source_ranges[index][0] <= upper:
+            source_lower, source_upper = source_ranges[index]
+            if source_lower > start:
+                orphans.append((start, source_lower - 1))
+            start = max(start, source_upper + 1)
+            index += 1
+        
+        if start <= upper:
+            orphans.append((start, upper))
+    
+    return orphans
+
+
+def count_keys(ranges: List[KeyRange]) -> int:
+    """Count keys in ranges of consecutive IDs"""
+    return sum(upper - lower + 1 for lower, upper in ranges)
+
+
+def find_orphan_ranges(reader, connection, table_name: str, primary_key: str, key_column: str,
+                       condition: str = '', window: int = 1000000) -> Optional[List[KeyRange]]:
+    """
+    Find key ranges present in MariaDB but no longer in MSSQL
+    
+    The key space is compared in windows of `window` IDs. Target ranges are
+    read before source ranges, so rows inserted meanwhile are never reported.
+    
+    Args:
+        reader: SourceReader (errors propagate instead of looking like an empty source)
+        connection: MariaDB connection
+        table_name: Source and target table name
+        primary_key: Integer primary key in MSSQL
+        key_column: Primary key column in MariaDB
+        condition: Table sync condition applied to the source
+        window: IDs compared per round trip
+    
+    Returns:
+        Sorted orphan ranges, or None if the target table is empty
+    """
+    cursor = connection.cursor()
+    try:
+        cursor.execute(f"SELECT MIN(`{key_column}`), MAX(`{key_column}`) FROM `{table_name}`")
+        bounds = cursor.fetchone()
+        if not bounds or bounds[0] is None:
+            return None
+        
+        orphans = []
+        for lower in range(int(bounds[0]), int(bounds[1]) + 1, window):
+            upper = min(lower + window - 1, int(bounds[1]))
+            
+            cursor.execute(build_target_ranges_query(table_name, key_column, lower, upper))
+            target_ranges = [(int(low), int(high)) for low, high in cursor.fetchall()]
+            if not target_ranges:
+                continue
+            
+            rows = reader.execute(
+                build_source_ranges_query(table_name, primary_key, lower, upper, condition), ['bigint', 'bigint']
+            )
+            source_ranges = [(int(low), int(high)) for low, high in rows]
+            orphans.extend(subtract_ranges(target_ranges, source_ranges))
+        
+        return orphans
+    finally:
+        cursor.close()
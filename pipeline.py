@@ -0,0 +1,253 @@
+"""
+Streaming fetch -> transform -> load pipeline for table sync
+
+Each stage runs in its own thread and hands batches to the next stage through
+a bounded queue, so the source reader keeps fetching while MariaDB is writing
+and a slow stage applies backpressure instead of buffering the whole table.
+"""
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, Optional
+
+# Marks the end of the batch stream in a queue
+_END = object()
+
+
+class StageStats:
+    """Busy/idle time of one pipeline stage"""
+    
+    def __init__(self, name: str):
+        self.name = name
+        self.busy = 0.0
+        self.idle = 0.0
+        self.items = 0
+    
+    def merge(self, other: 'StageStats'):
+        """Add the counters of another run of the same stage"""
+        self.busy += other.busy
+        self.idle += other.idle
+        self.items += other.items
+    
+    def __str__(self) -> str:
+        total = self.busy + self.idle
+        utilization = (self.busy / total * 100) if total else 0.0
+        return f"{self.name} busy {self.busy:.2f}s idle {self.idle:.2f}s ({utilization:.0f}% busy, {self.items} batches)"
+
+
+class AdaptiveRateLimiter:
+    """
+    Pace writes to MariaDB instead of sleeping a fixed time per batch
+    
+    Enforces an optional rows/second ceiling and backs off when batch write
+    latency rises above the target, recovering again while writes are fast.
+    """
+    
+    def __init__(self, max_rows_per_second: float = 0, target_latency: float = 1.0, max_delay: float = 5.0):
+        self.max_rows_per_second = max_rows_per_second
+        self.target_latency = target_latency
+        self.max_delay = max_delay
+        self.delay = 0.0
+        self._next_allowed = time.monotonic()
+        self._lock = threading.Lock()
+    
+    def wait(self, rows: int, write_seconds: float):
+        """Sleep as needed after writing a batch of rows that took write_seconds"""
+        with self._lock:
+            if self.target_latency and write_seconds > self.target_latency:
+                self.delay = min(self.max_delay, max(self.delay * 2, 0.05))
+            else:
+                self.delay = self.delay / 2 if self.delay > 0.01 else 0.0
+            
+            now = time.monotonic()
+            wait_until = now + self.delay
+            if self.max_rows_per_second and rows:
+                self._next_allowed = max(self._next_allowed, now) + rows / self.max_rows_per_second
+                wait_until = max(wait_until, self._next_allowed)
+        
+        pause = wait_until - time.monotonic()
+        if pause > 0:
+            time.sleep(pause)
+
+
+class BatchSizeController:
+    """
+    Tune the batch size of one table from measured batch timings
+    
+    Every fetch and write reports its rows and duration. The controller keeps
+    a moving average of seconds per row for both, and sizes batches so the
+    slower stage takes about target_seconds per batch. Per-query overhead
+    (a client subprocess, a round trip) makes small batches slow per row, so
+    the size grows until the batch time reaches the target. Wide rows are
+    also capped by max_batch_bytes. The size grows to at most twice the last
+    measured batch and always stays within [min_size, max_size].
+    """
+    
+    def __init__(self, initial_size: int, min_size: int, max_size: int, target_seconds: float = 0.5,
+                 max_batch_bytes: int = 32 * 1024 * 1024, smoothing: float = 0.3):
+        self.min_size = max(1, min_size)
+        self.max_size = max(self.min_size, max_size)
+        self.target_seconds = target_seconds
+        self.max_batch_bytes = max_batch_bytes
+        self.smoothing = smoothing
+        self.size = self._clamp(initial_size)
+        self.initial_size = self.size
+        self.fetch_seconds_per_row = None
+        self.write_seconds_per_row = None
+        self.bytes_per_row = None
+        self._lock = threading.Lock()
+    
+    @property
+    def adaptive(self) -> bool:
+        return self.min_size < self.max_size
+    
+    def _clamp(self, size: float) -> int:
+        return int(min(self.max_size, max(self.min_size, size)))
+    
+    def _average(self, current: Optional[float], sample: float) -> float:
+        return sample if current is None else current + self.smoothing * (sample - current)
+    
+    def record_fetch(self, rows: int, seconds: float, bytes_per_row: Optional[float] = None):
+        """Report a fetched batch"""
+        if rows <= 0:
+            return
+        with self._lock:
+            self.fetch_seconds_per_row = self._average(self.fetch_seconds_per_row, seconds / rows)
+            if bytes_per_row:
+                self.bytes_per_row = self._average(self.bytes_per_row, bytes_per_row)
+            self._adjust(rows)
+    
+    def record_write(self, rows: int, seconds: float):
+        """Report a written batch"""
+        if rows <= 0:
+            return
+        with self._lock:
+            self.write_seconds_per_row = self._average(self.write_seconds_per_row, seconds / rows)
+            self._adjust(rows)
+    
+    def _adjust(self, measured_rows: int):
+        if not self.adaptive:
+            return
+        seconds_per_row = max(self.fetch_seconds_per_row or 0.0, self.write_seconds_per_row or 0.0)
+        size = self.target_seconds / seconds_per_row if seconds_per_row > 0 else self.max_size
+        if self.bytes_per_row:
+            size = min(size, self.max_batch_bytes / self.bytes_per_row)
+        # Grow by at most 2x the batch just measured
+        if size > self.size:
+            size = min(size, max(self.size, measured_rows * 2))
+        self.size = self._clamp(size)
+
+
+def run_pipeline(batches: Iterator[Any], transform: Callable[[Any], Any],
+                 load: Callable[[Any], None], depth: int = 2) -> Dict[str, StageStats]:
+    """
+    Run fetch, transform and load concurrently over a stream of batches
+    
+    The batches iterator is consumed in a fetch thread, transform runs in a
+    second thread and load runs in the calling thread. An exception in any
+    stage stops the others and is re-raised here.
+    
+    Args:
+        batches: Iterator producing raw batches (consumed on the fetch thread)
+        transform: Function converting a raw batch into a loadable batch
+        load: Function writing one transformed batch
+        depth: Maximum number of batches waiting between two stages
+    
+    Returns:
+        Stage statistics keyed by stage name
+    """
+    stats = {name: StageStats(name) for name in ('fetch', 'transform', 'load')}
+    fetched = queue.Queue(maxsize=max(1, depth))
+    transformed = queue.Queue(maxsize=max(1, depth))
+    stop = threading.Event()
+    errors = []
+    
+    def put(target: queue.Queue, item, stage: StageStats) -> bool:
+        start = time.monotonic()
+        while not stop.is_set():
+            try:
+                target.put(item, timeout=0.1)
+                stage.idle += time.monotonic() - start
+                return True
+            except queue.Full:
+                continue
+        return False
+    
+    def get(source: queue.Queue, stage: StageStats) -> Optional[Any]:
+        start = time.monotonic()
+        while not stop.is_set():
+            try:
+                item = source.get(timeout=0.1)
+                stage.idle += time.monotonic() - start
+                return item
+            except queue.Empty:
+                continue
+        return _END
+    
+    def fetch_stage():
+        stage = stats['fetch']
+        try:
+            while not stop.is_set():
+                start = time.monotonic()
+                batch = next(batches, _END)
+                stage.busy += time.monotonic() - start
+                if batch is _END or not put(fetched, batch, stage):
+                    break
+                stage.items += 1
+        except Exception as e:
+            errors.append(e)
+            stop.set()
+        finally:
+            # Close the iterator on this thread so its cleanup runs where it was used
+            close = getattr(batches, 'close', None)
+            if close:
+                close()
+            put(fetched, _END, stage)
+    
+    def transform_stage():
+        stage = stats['transform']
+        try:
+            while True:
+                batch = get(fetched, stage)
+                if batch is _END:
+                    break
+                start = time.monotonic()
+                result = transform(batch)
+                stage.busy += time.monotonic() - start
+                stage.items += 1
+                if not put(transformed, result, stage):
+                    break
+        except Exception as e:
+            errors.append(e)
+            stop.set()
+        finally:
+            put(transformed, _END, stage)
+    
+    threads = [
+        threading.Thread(target=fetch_stage, name='pipeline-fetch', daemon=True),
+        threading.Thread(target=transform_stage, name='pipeline-transform', daemon=True)
+    ]
+    for thread in threads:
+        thread.start()
+    
+    stage = stats['load']
+    try:
+        while True:
+            batch = get(transformed, stage)
+            if batch is _END:
+                break
+            start = time.monotonic()
+            load(batch)
+            stage.busy += time.monotonic() - start
+            stage.items += 1
+    except Exception as e:
+        errors.append(e)
+        stop.set()
+    finally:
+        for thread in threads:
+            thread.join()
+    
+    if errors:
+        raise errors[0]
+    
+    return stats
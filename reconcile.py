@@ -0,0 +1,310 @@
+"""
+Reconcile MariaDB tables against their MSSQL source
+
+The primary key range is split into buckets and an aggregate fingerprint is
+computed per bucket on both sides with one GROUP BY query per side. Only
+buckets whose fingerprints differ are split further, so the number of round
+trips grows with the number of differences rather than the table size. At the
+leaves the rows themselves are compared to list missing, extra and changed IDs.
+
+MSSQL and MariaDB share no row hash function, so the fingerprint is built from
+portable aggregates: row count, key sum, and per column a sum of the value
+(numbers), of seconds since 2000-01-01 (dates) or of the text length (strings),
+each multiplied by the row's key. Weighting by the key catches changes that
+cancel out in a plain sum, such as values swapped between two rows. Columns
+without a portable aggregate (float, text, binary) are only compared in the
+buckets that are compared row by row.
+"""
+import logging
+import math
+from datetime import datetime, time, timedelta
+from decimal import Decimal
+from typing import Any, Dict, List, Optional, Tuple
+
+from data_types import build_row_transform
+
+logger = logging.getLogger(__name__)
+
+_INTEGER_TYPES = ('int', 'bigint', 'smallint', 'tinyint', 'bit')
+_EXACT_NUMERIC_TYPES = ('decimal', 'numeric', 'money', 'smallmoney')
+_DATETIME_TYPES = ('datetime', 'datetime2', 'smalldatetime', 'date')
+_STRING_TYPES = ('char', 'varchar', 'nchar', 'nvarchar', 'uniqueidentifier')
+
+
+def _base_type(sql_type: str) -> str:
+    return sql_type.lower().split('(')[0].strip()
+
+
+def column_fingerprint(source_column: str, target_column: str, sql_type: str,
+                       source_key: str, target_key: str) -> Optional[Tuple[str, str, str]]:
+    """
+    Get matching MSSQL and MariaDB aggregate expressions for one column
+    
+    Every value is multiplied by the row's primary key before summing, in
+    DECIMAL so large keys and sums cannot overflow.
+    
+    Returns:
+        (MSSQL expression, MariaDB expression, SQL Server type of the result),
+        or None for types without a portable aggregate (float, text, binary)
+    """
+    base_type = _base_type(sql_type)
+    
+    if base_type in _INTEGER_TYPES or base_type in _EXACT_NUMERIC_TYPES:
+        source_value, target_value = source_column, f"`{target_column}`"
+    elif base_type in _DATETIME_TYPES:
+        # Days and seconds are added separately so DATEDIFF cannot overflow
+        source_value = (f"(CAST(DATEDIFF(DAY, '2000-01-01', {source_column}) AS BIGINT) * 86400 "
+                        f"+ DATEDIFF(SECOND, CAST({source_column} AS DATE), {source_column}))")
+        target_value = f"TIMESTAMPDIFF(SECOND, '2000-01-01', `{target_column}`)"
+    elif base_type in _STRING_TYPES:
+        # Lengths keep '' and NULL equal, since empty strings are stored as NULL
+        source_value, target_value = f"LEN({source_column})", f"CHAR_LENGTH(`{target_column}`)"
+    else:
+        return None
+    
+    return (f"SUM(CAST({source_key} AS DECIMAL(19,0)) * {source_value})",
+            f"SUM(CAST(`{target_key}` AS DECIMAL(19,0)) * {target_value})",
+            'decimal')
+
+
+def _normalize_aggregate(value) -> Optional[Decimal]:
+    if value is None:
+        return None
+    return Decimal(str(value))
+
+
+def _normalize_value(value) -> Any:
+    """Bring a source or target value to a comparable form"""
+    if isinstance(value, bool):
+        return int(value)
+    if isinstance(value, datetime):
+        # MariaDB DATETIME keeps whole seconds
+        return value.replace(microsecond=0)
+    if isinstance(value, time):
+        return timedelta(hours=value.hour, minutes=value.minute, seconds=value.second)
+    if isinstance(value, timedelta):
+        return timedelta(seconds=int(value.total_seconds()))
+    if isinstance(value, bytearray):
+        return bytes(value)
+    if isinstance(value, str) and value == '':
+        return None
+    return value
+
+
+def values_equal(source_value, target_value) -> bool:
+    """Compare a cleaned source value with the stored target value"""
+    source_value = _normalize_value(source_value)
+    target_value = _normalize_value(target_value)
+    
+    if isinstance(source_value, float) or isinstance(target_value, float):
+        if source_value is None or target_value is None:
+            return source_value is target_value
+        # MariaDB FLOAT is single precision
+        return math.isclose(float(source_value), float(target_value), rel_tol=1e-6, abs_tol=1e-9)
+    
+    return source_value == target_value
+
+
+class TableReconciler:
+    """
+    Finds rows that differ between an MSSQL table and its MariaDB copy
+    
+    Args:
+        syncer: Connected DatabaseSyncer providing readers, connections and table plans
+        table_name: Configured source table
+        columns: Table structure from DatabaseSyncer.get_table_structure
+        fanout: Buckets per range at each level
+        leaf_rows: Largest bucket compared row by row
+    """
+    
+    def __init__(self, syncer, table_name: str, columns: List[Tuple[str, str]], fanout: int = 16,
+                 leaf_rows: int = 1000):
+        self.syncer = syncer
+        self.table_name = table_name
+        self.fanout = max(2, fanout)
+        self.leaf_rows = max(1, leaf_rows)
+        
+        self.source_columns, self.target_columns = syncer._get_column_mappings(table_name, columns)
+        self.column_types = [col_type for _, col_type in columns]
+        self.transform = build_row_transform(self.column_types)
+        self.key_index = syncer._get_key_index(table_name, self.source_columns)
+        if self.key_index is not None:
+            self.source_key = self.source_columns[self.key_index]
+            self.target_key = self.target_columns[self.key_index]
+        self.condition = syncer.config.get_table_condition(table_name) or ''
+        
+        self.fingerprints = []
+        uncovered = []
+        if self.key_index is not None:
+            for source_column, target_column, col_type in zip(self.source_columns, self.target_columns, self.column_types):
+                fingerprint = column_fingerprint(source_column, target_column, col_type,
+                                                 self.source_key, self.target_key)
+                if fingerprint:
+                    self.fingerprints.append(fingerprint)
+                else:
+                    uncovered.append(f"{source_column} ({col_type})")
+        if uncovered:
+            logger.warning(f"Table {table_name}: bucket fingerprints do not cover {', '.join(uncovered)}; "
+                           f"changes there are only found in buckets compared row by row")
+        
+        self.round_trips = 0
+        self.source_rows = {}
+    
+    def _source_query(self, select: str, lower: int, upper: int, suffix: str = '') -> str:
+        query = f"SELECT {select} FROM {self.table_name} WHERE {self.source_key} BETWEEN {lower} AND {upper}"
+        if self.condition:
+            query += f" AND ({self.condition})"
+        return query + suffix
+    
+    def _target_query(self, select: str, lower: int, upper: int, suffix: str = '') -> str:
+        return f"SELECT {select} FROM `{self.table_name}` WHERE `{self.target_key}` BETWEEN {lower} AND {upper}{suffix}"
+    
+    def _target_fetch(self, query: str) -> List[tuple]:
+        self.round_trips += 1
+        cursor = self.syncer.mariadb_conn.cursor()
+        try:
+            cursor.execute(query)
+            return cursor.fetchall()
+        finally:
+            cursor.close()
+    
+    def _source_fetch(self, query: str, column_types: List[str]) -> List[tuple]:
+        self.round_trips += 1
+        return self.syncer.source_reader.execute(query, column_types)
+    
+    def _key_bounds(self) -> Tuple[Optional[int], Optional[int]]:
+        """Get the key range covering both tables"""
+        query = f"SELECT MIN({self.source_key}), MAX({self.source_key}) FROM {self.table_name}"
+        if self.condition:
+            query += f" WHERE ({self.condition})"
+        key_type = self.column_types[self.key_index]
+        source = self._source_fetch(query, [key_type, key_type])
+        target = self._target_fetch(f"SELECT MIN(`{self.target_key}`), MAX(`{self.target_key}`) FROM `{self.table_name}`")
+        
+        lows = [row[0][0] for row in (source, target) if row and row[0][0] is not None]
+        highs = [row[0][1] for row in (source, target) if row and row[0][1] is not None]
+        if not lows:
+            return None, None
+        return int(min(lows)), int(max(highs))
+    
+    def _bucket_fingerprints(self, lower: int, upper: int, width: int) -> Tuple[Dict[int, tuple], Dict[int, tuple]]:
+        """Get per bucket fingerprints of [lower, upper] from both sides"""
+        source_bucket = f"({self.source_key} - {lower}) / {width}"
+        source_select = ', '.join(
+            [source_bucket, 'COUNT(*)', f"SUM(CAST({self.source_key} AS BIGINT))"] +
+            [source_expr for source_expr, _, _ in self.fingerprints]
+        )
+        source_types = ['bigint', 'bigint', 'bigint'] + [result_type for _, _, result_type in self.fingerprints]
+        source = self._source_fetch(
+            self._source_query(source_select, lower, upper, f" GROUP BY {source_bucket}"), source_types
+        )
+        
+        target_bucket = f"(`{self.target_key}` - {lower}) DIV {width}"
+        target_select = ', '.join(
+            [target_bucket, 'COUNT(*)', f"SUM(`{self.target_key}`)"] +
+            [target_expr for _, target_expr, _ in self.fingerprints]
+        )
+        target = self._target_fetch(self._target_query(target_select, lower, upper, f" GROUP BY {target_bucket}"))
+        
+        def by_bucket(rows):
+            return {int(row[0]): tuple(_normalize_aggregate(value) for value in row[1:]) for row in rows}
+        
+        return by_bucket(source), by_bucket(target)
+    
+    def _compare_rows(self, lower: int, upper: int, result: Dict[str, List]):
+        """Compare all rows of a leaf bucket"""
+        source_rows = self._source_fetch(
+            self._source_query(self.syncer.source_reader.select_list(self.source_columns, self.column_types),
+                               lower, upper, f" ORDER BY {self.source_key}"),
+            self.column_types
+        )
+        source_rows = self.syncer._clean_batch_data(self.table_name, source_rows, len(self.source_columns), self.transform)
+        target_rows = self._target_fetch(
+            self._target_query(f"`{'`, `'.join(self.target_columns)}`", lower, upper)
+        )
+        
+        source_by_key = {row[self.key_index]: row for row in source_rows}
+        target_by_key = {row[self.key_index]: row for row in target_rows}
+        
+        for key, row in source_by_key.items():
+            target_row = target_by_key.get(key)
+            if target_row is None:
+                result['missing'].append(key)
+                self.source_rows[key] = row
+            elif not all(values_equal(a, b) for a, b in zip(row, target_row)):
+                result['changed'].append(key)
+                self.source_rows[key] = row
+        
+        result['extra'].extend(key for key in target_by_key if key not in source_by_key)
+    
+    def diff(self) -> Optional[Dict[str, List]]:
+        """
+        Compare the table on both sides
+        
+        Returns:
+            Sorted 'missing', 'extra' and 'changed' primary keys, or None when
+            the table has no integer primary key
+        """
+        if self.key_index is None:
+            return None
+        
+        key_type = _base_type(self.column_types[self.key_index])
+        if key_type not in _INTEGER_TYPES:
+            logger.warning(f"Table {self.table_name}: reconcile needs an integer primary key ({key_type})")
+            return None
+        
+        result = {'missing': [], 'extra': [], 'changed': []}
+        min_key, max_key = self._key_bounds()
+        if min_key is None:
+            return result
+        
+        ranges = [(min_key, max_key)]
+        while ranges:
+            lower, upper = ranges.pop()
+            width = max(1, -(-(upper - lower + 1) // self.fanout))
+            source, target = self._bucket_fingerprints(lower, upper, width)
+            
+            for bucket in sorted(set(source) | set(target)):
+                if source.get(bucket) == target.get(bucket):
+                    continue
+                
+                bucket_lower = lower + bucket * width
+                bucket_upper = min(bucket_lower + width - 1, upper)
+                rows = max(int((source.get(bucket) or (0,))[0]), int((target.get(bucket) or (0,))[0]))
+                
+                if rows <= self.leaf_rows or width == 1:
+                    self._compare_rows(bucket_lower, bucket_upper, result)
+                else:
+                    ranges.append((bucket_lower, bucket_upper))
+        
+        for keys in result.values():
+            keys.sort()
+        return result
+    
+    def repair(self, result: Dict[str, List], writer, batch_size: int = 1000) -> int:
+        """
+        Upsert missing and changed rows and delete extra rows (caller commits)
+        
+        Args:
+            result: Output of diff()
+            writer: TargetWriter upserting into the target table
+            batch_size: Keys per DELETE statement
+        
+        Returns:
+            Number of repaired rows
+        """
+        keys = sorted(result['missing'] + result['changed'])
+        rows = [self.source_rows[key] for key in keys]
+        for start in range(0, len(rows), batch_size):
+            writer.write(rows[start:start + batch_size], keys[min(start + batch_size, len(keys)) - 1])
+        
+        cursor = self.syncer.mariadb_conn.cursor()
+        try:
+            extra = result['extra']
+            for start in range(0, len(extra), batch_size):
+                key_list = ', '.join(str(int(key)) for key in extra[start:start + batch_size])
+                cursor.execute(f"DELETE FROM `{self.table_name}` WHERE `{self.target_key}` IN ({key_list})")
+        finally:
+            cursor.close()
+        
+        return len(rows) + len(result['extra'])
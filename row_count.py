@@ -0,0 +1,43 @@
+"""
+Approximate row counts for progress reporting
+
+A filtered COUNT(*) scans the whole table on every run only to print progress
+percentages. Instead the total comes from the row count SQL Server keeps in
+sys.partitions (heap or clustered index), and for incremental tables the
+share of rows after the last synced key is estimated from the primary key
+range, which MIN/MAX read with an index seek.
+"""
+from typing import Optional
+
+
+def build_partition_rows_query(table_name: str) -> str:
+    """Build the query returning the table's row count from sys.partitions"""
+    return (f"SELECT SUM(rows) FROM sys.partitions "
+            f"WHERE object_id = OBJECT_ID('{table_name}') AND index_id IN (0, 1)")
+
+
+def estimate_rows_after_key(total_rows: int, min_key, max_key, last_key) -> Optional[int]:
+    """
+    Estimate rows with a key above last_key assuming keys are spread evenly
+    
+    Args:
+        total_rows: Rows in the whole table
+        min_key: Smallest primary key
+        max_key: Largest primary key
+        last_key: Last synced key
+    
+    Returns:
+        Estimated row count, or None if the keys are not integers
+    """
+    try:
+        min_key, max_key, last_key = int(min_key), int(max_key), int(last_key)
+    except (TypeError, ValueError):
+        return None
+    
+    if last_key >= max_key:
+        return 0
+    if last_key < min_key:
+        return total_rows
+    
+    span = max_key - min_key + 1
+    return min(total_rows, max(1, round(total_rows * (max_key - last_key) / span)))
@@ -0,0 +1,88 @@
+"""
+Row fingerprints for change detection
+
+MSSQL computes a BINARY_CHECKSUM per row; the checksum of the version last
+written to MariaDB is kept in the sync_row_hashes table. Comparing the two
+sides by primary key range finds the rows that actually changed without
+transferring unchanged rows.
+"""
+from typing import Dict, Iterable, List, Tuple
+
+ROW_HASH_TABLE = 'sync_row_hashes'
+
+
+def build_source_hash_query(table_name: str, primary_key: str, columns: List[str], batch_size: int,
+                            last_key=None, condition: str = '') -> str:
+    """
+    Build the MSSQL query returning (primary key, row checksum) for the next page of rows
+    
+    Args:
+        table_name: Source table
+        primary_key: Integer primary key column
+        columns: Source columns covered by the checksum
+        batch_size: Rows per page
+        last_key: Exclusive lower bound of the page (None for the first page)
+        condition: Optional extra WHERE condition
+    """
+    conditions = [f"({condition})"] if condition else []
+    if last_key is not None:
+        conditions.append(f"{primary_key} > {int(last_key)}")
+    where = f" WHERE {' AND '.join(conditions)}" if conditions else ''
+    checksum_columns = ', '.join(f"[{col}]" for col in columns)
+    return (f"SELECT TOP {batch_size} {primary_key}, BINARY_CHECKSUM({checksum_columns}) "
+            f"FROM {table_name}{where} ORDER BY {primary_key}")
+
+
+class RowHashStore:
+    """Stores the source checksum of every row written to MariaDB"""
+    
+    def __init__(self, connection):
+        self.connection = connection
+    
+    def ensure_table(self):
+        """Create the checksum table if it does not exist"""
+        cursor = self.connection.cursor()
+        cursor.execute(f"""
+            CREATE TABLE IF NOT EXISTS `{ROW_HASH_TABLE}` (
+                `table_name` VARCHAR(64) NOT NULL,
+                `pk` BIGINT NOT NULL,
+                `row_hash` INT,
+                PRIMARY KEY (`table_name`, `pk`)
+            ) ENGINE=InnoDB
+        """)
+        cursor.close()
+    
+    def load_range(self, table_name: str, first_key: int, last_key: int) -> Dict[int, int]:
+        """Get stored checksums for first_key <= pk <= last_key"""
+        cursor = self.connection.cursor()
+        cursor.execute(
+            f"SELECT `pk`, `row_hash` FROM `{ROW_HASH_TABLE}` WHERE `table_name` = %s AND `pk` BETWEEN %s AND %s",
+            (table_name, first_key, last_key)
+        )
+        stored = {pk: row_hash for pk, row_hash in cursor.fetchall()}
+        cursor.close()
+        return stored
+    
+    def save(self, table_name: str, hashes: Iterable[Tuple[int, int]]):
+        """Upsert checksums of rows that were just written (caller commits)"""
+        rows = [(table_name, pk, row_hash) for pk, row_hash in hashes]
+        if not rows:
+            return
+        cursor = self.connection.cursor()
+        cursor.executemany(
+            f"INSERT INTO `{ROW_HASH_TABLE}` (`table_name`, `pk`, `row_hash`) VALUES (%s, %s, %s) "
+            "ON DUPLICATE KEY UPDATE `row_hash` = VALUES(`row_hash`)",
+            rows
+        )
+        cursor.close()
+    
+    def clear(self, table_name: str):
+        """Forget all checksums of a table (next run rewrites every row)"""
+        cursor = self.connection.cursor()
+        cursor.execute(f"DELETE FROM `{ROW_HASH_TABLE}` WHERE `table_name` = %s", (table_name,))
+        cursor.close()
+
+
+def find_changed_keys(source_hashes: List[Tuple[int, int]], stored_hashes: Dict[int, int]) -> List[Tuple[int, int]]:
+    """Return (pk, hash) pairs whose source checksum is new or differs from the stored one"""
+    return [(pk, row_hash) for pk, row_hash in source_hashes if stored_hashes.get(pk) != row_hash]
@@ -0,0 +1,176 @@
+"""
+Schema metadata cache with drift detection
+
+Source column lists are cached in schema_cache.json together with the table's
+modify_date from sys.objects, which changes on every ALTER TABLE. While the
+fingerprint is unchanged, runs reuse the cached columns instead of querying
+INFORMATION_SCHEMA, and incremental tables skip the MariaDB existence check.
+When it changes, the MariaDB table is compared with the new columns and
+added or widened columns are applied with ALTER TABLE.
+"""
+import json
+import logging
+import os
+import re
+import threading
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+_INTEGER_RANK = {'tinyint': 1, 'smallint': 2, 'mediumint': 3, 'int': 4, 'bigint': 5}
+_TEXT_RANK = {'tinytext': 1, 'text': 2, 'mediumtext': 3, 'longtext': 4}
+# Names MariaDB reports for the types convert_datatype produces
+_TYPE_ALIASES = {'boolean': 'tinyint', 'bool': 'tinyint', 'real': 'double', 'integer': 'int', 'numeric': 'decimal'}
+
+
+class SchemaCache:
+    """Persisted source columns per table, keyed by the table's modify_date"""
+    
+    def __init__(self, cache_file: str = 'schema_cache.json'):
+        self.cache_file = cache_file
+        self._lock = threading.Lock()
+        self.tables = self._load()
+    
+    def _load(self) -> dict:
+        if os.path.exists(self.cache_file):
+            try:
+                with open(self.cache_file, 'r') as f:
+                    return json.load(f)
+            except (json.JSONDecodeError, IOError) as e:
+                # Only costs metadata queries, unlike a lost sync tracker
+                logger.warning(f"Ignoring unreadable schema cache {self.cache_file}: {e}")
+        return {}
+    
+    def _save(self):
+        temp_file = f"{self.cache_file}.tmp.{os.getpid()}"
+        try:
+            with open(temp_file, 'w') as f:
+                json.dump(self.tables, f, indent=2)
+            os.replace(temp_file, self.cache_file)
+        except (IOError, OSError) as e:
+            logger.warning(f"Could not save schema cache: {e}")
+    
+    def get_columns(self, table_name: str, fingerprint: Optional[str]) -> Optional[List[Tuple[str, str]]]:
+        """Get cached source columns if the table has not changed since they were read"""
+        entry = self.tables.get(table_name)
+        if not fingerprint or not entry or entry.get('modify_date') != fingerprint:
+            return None
+        return [tuple(column) for column in entry['columns']]
+    
+    def set_columns(self, table_name: str, fingerprint: Optional[str], columns: List[Tuple[str, str]]):
+        """Cache source columns read for the given fingerprint"""
+        if not fingerprint:
+            return
+        with self._lock:
+            entry = self.tables.get(table_name, {})
+            if entry.get('modify_date') != fingerprint:
+                # The MariaDB table has to be checked against the new columns
+                entry = {}
+            entry['modify_date'] = fingerprint
+            entry['columns'] = [list(column) for column in columns]
+            self.tables[table_name] = entry
+            self._save()
+    
+    def is_target_current(self, table_name: str, columns: List[Tuple[str, str]]) -> bool:
+        """Check if the MariaDB table was last verified against exactly these columns"""
+        entry = self.tables.get(table_name, {})
+        return entry.get('target_columns') == [list(column) for column in columns]
+    
+    def set_target(self, table_name: str, columns: List[Tuple[str, str]]):
+        """Record that the MariaDB table matches these columns"""
+        with self._lock:
+            if table_name in self.tables:
+                self.tables[table_name]['target_columns'] = [list(column) for column in columns]
+                self._save()
+    
+    def invalidate(self, table_name: str):
+        """Forget the MariaDB state of a table so the next run checks it again"""
+        with self._lock:
+            if self.tables.get(table_name, {}).pop('target_columns', None) is not None:
+                self._save()
+
+
+def _parse_type(column_type: str) -> Tuple[str, List[int]]:
+    """Split a type like 'varchar(50)' or 'decimal(10,2)' into base type and sizes"""
+    match = re.match(r'\s*(\w+)\s*(?:\(([\d\s,]+)\))?', column_type.lower())
+    if not match:
+        return column_type.lower().strip(), []
+    sizes = [int(size) for size in match.group(2).split(',')] if match.group(2) else []
+    return _TYPE_ALIASES.get(match.group(1), match.group(1)), sizes
+
+
+def widen_type(current: str, expected: str) -> Optional[str]:
+    """
+    Get the type a MariaDB column must be changed to so it holds the expected type
+    
+    Returns:
+        New column type, or None if the current type is already wide enough
+        or the change is not a widening
+    """
+    current_base, current_sizes = _parse_type(current)
+    expected_base, expected_sizes = _parse_type(expected)
+    
+    if current_base in _INTEGER_RANK and expected_base in _INTEGER_RANK:
+        return expected if _INTEGER_RANK[expected_base] > _INTEGER_RANK[current_base] else None
+    
+    if current_base in ('varchar', 'char') and expected_base in ('varchar', 'char'):
+        if current_sizes and expected_sizes and expected_sizes[0] > current_sizes[0]:
+            return f"{current_base.upper()}({expected_sizes[0]})"
+        return None
+    
+    if current_base in ('varchar', 'char') and expected_base in _TEXT_RANK:
+        return expected
+    
+    if current_base in _TEXT_RANK and expected_base in _TEXT_RANK:
+        return expected if _TEXT_RANK[expected_base] > _TEXT_RANK[current_base] else None
+    
+    if current_base == 'decimal' and expected_base == 'decimal' and expected_sizes:
+        current_precision, current_scale = (current_sizes + [10, 0])[:2] if current_sizes else (10, 0)
+        expected_precision, expected_scale = (expected_sizes + [0])[:2]
+        scale = max(current_scale, expected_scale)
+        precision = max(current_precision - current_scale, expected_precision - expected_scale) + scale
+        if (precision, scale) != (current_precision, current_scale):
+            return f"DECIMAL({precision},{scale})"
+        return None
+    
+    return None
+
+
+def plan_schema_changes(expected: List[Tuple[str, str]], current: Dict[str, str]) -> Tuple[List[str], List[str]]:
+    """
+    Compare the columns a table should have with the columns it has
+    
+    Args:
+        expected: (column, MariaDB type) in source order
+        current: MariaDB column name -> COLUMN_TYPE
+    
+    Returns:
+        (ALTER TABLE clauses for added/widened columns, warnings for drift that is not applied)
+    """
+    clauses = []
+    warnings = []
+    current_lower = {name.lower(): (name, column_type) for name, column_type in current.items()}
+    
+    for col_name, mariadb_type in expected:
+        existing = current_lower.get(col_name.lower())
+        if existing is None:
+            clauses.append(f"ADD COLUMN `{col_name}` {mariadb_type}")
+            continue
+        
+        name, column_type = existing
+        widened = widen_type(column_type, mariadb_type)
+        current_base = _parse_type(column_type)[0]
+        expected_base = _parse_type(mariadb_type)[0]
+        if widened:
+            # MODIFY replaces the whole definition; the ID column is created AUTO_INCREMENT
+            auto_increment = ' AUTO_INCREMENT' if name.upper() == 'ID' else ''
+            clauses.append(f"MODIFY COLUMN `{name}` {widened}{auto_increment}")
+        elif current_base != expected_base and not (current_base in _INTEGER_RANK and expected_base in _INTEGER_RANK):
+            warnings.append(f"column {name} is {column_type} in MariaDB but {mariadb_type} is expected")
+    
+    expected_names = {col_name.lower() for col_name, _ in expected}
+    for name in current:
+        if name.lower() not in expected_names:
+            warnings.append(f"column {name} no longer exists in the source (kept)")
+    
+    return clauses, warnings
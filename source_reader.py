@@ -0,0 +1,386 @@
+"""
+Source readers for MSSQL queries
+
+A reader owns the connection to the source database and returns query results
+as rows of Python values. Driver based readers keep one connection open for the
+whole run; the sqlcmd/tsql reader is kept as a fallback for hosts without a
+Python MSSQL driver.
+"""
+import logging
+import re
+import sqlite3
+import subprocess
+import tempfile
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+from config import MSSQL_FIELD_SEPARATOR
+from data_types import CLIENT_CR_ESCAPE, CLIENT_LF_ESCAPE, build_text_decoders, decode_text_row
+
+logger = logging.getLogger(__name__)
+
+
+class SourceReader:
+    """Interface for reading query results from the source database"""
+    
+    name = 'base'
+    # True if stream() yields rows before the whole result is read
+    streams = False
+    
+    def execute(self, query: str, column_types: Optional[List[str]] = None) -> List[tuple]:
+        """
+        Execute query and return all rows as tuples of Python values
+        
+        Args:
+            query: SQL query
+            column_types: SQL Server types of the result columns, used by
+                readers that receive text to decode values losslessly
+        """
+        raise NotImplementedError
+    
+    def stream(self, query: str, column_types: Optional[List[str]] = None) -> Iterator[tuple]:
+        """Execute query and yield its rows (the default reads all rows first)"""
+        yield from self.execute(query, column_types)
+    
+    def select_list(self, columns: List[str], column_types: Optional[List[str]] = None) -> str:
+        """Build the SELECT list reading columns (column expressions) of the given SQL Server types"""
+        return ', '.join(columns)
+    
+    def close(self):
+        """Release the underlying connection"""
+        pass
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+class DBAPISourceReader(SourceReader):
+    """Reader backed by a persistent DB-API 2.0 connection"""
+    
+    name = 'dbapi'
+    
+    def __init__(self, connect: Callable[[], Any]):
+        self._connect = connect
+        self.connection = None
+    
+    def _get_connection(self):
+        """Open the connection on first use and reuse it afterwards"""
+        if self.connection is None:
+            self.connection = self._connect()
+            logger.info(f"Connected to source database using {self.name}")
+        return self.connection
+    
+    def execute(self, query: str, column_types: Optional[List[str]] = None) -> List[tuple]:
+        """Execute query on the persistent connection and return driver-typed rows"""
+        connection = self._get_connection()
+        cursor = connection.cursor()
+        try:
+            cursor.execute(query)
+            rows = cursor.fetchall() if cursor.description else []
+            return [tuple(row) for row in rows]
+        except Exception:
+            # Drop a possibly broken connection so the next query reconnects
+            self.close()
+            raise
+        finally:
+            try:
+                cursor.close()
+            except Exception:
+                pass
+    
+    def close(self):
+        """Close the persistent connection"""
+        if self.connection is not None:
+            try:
+                self.connection.close()
+            except Exception:
+                pass
+            self.connection = None
+
+
+class PymssqlSourceReader(DBAPISourceReader):
+    """Reader using the pymssql (FreeTDS) driver"""
+    
+    name = 'pymssql'
+    
+    def __init__(self, mssql_config: Dict[str, Any]):
+        import pymssql
+        
+        super().__init__(lambda: pymssql.connect(
+            server=mssql_config['server'],
+            user=mssql_config['username'],
+            password=mssql_config['password'],
+            database=mssql_config['database'],
+            port=mssql_config['port'],
+            login_timeout=mssql_config.get('login_timeout', 30)
+        ))
+
+
+class PyodbcSourceReader(DBAPISourceReader):
+    """Reader using pyodbc with the Microsoft ODBC driver"""
+    
+    name = 'pyodbc'
+    
+    def __init__(self, mssql_config: Dict[str, Any]):
+        import pyodbc
+        
+        connection_string = (
+            f"DRIVER={{{mssql_config.get('odbc_driver', 'ODBC Driver 18 for SQL Server')}}};"
+            f"SERVER={mssql_config['server']},{mssql_config['port']};"
+            f"DATABASE={mssql_config['database']};"
+            f"UID={mssql_config['username']};"
+            f"PWD={mssql_config['password']};"
+            "TrustServerCertificate=yes"
+        )
+        super().__init__(lambda: pyodbc.connect(connection_string))
+
+
+# T-SQL constructs rewritten by SqliteSourceReader
+_TOP_PATTERN = re.compile(r'^\s*SELECT\s+TOP\s+(\d+)\s+', re.IGNORECASE)
+_COLUMNS_LOOKUP_PATTERN = re.compile(
+    r"FROM\s+INFORMATION_SCHEMA\.COLUMNS\s+WHERE\s+TABLE_NAME\s*=\s*'([^']+)'", re.IGNORECASE
+)
+
+
+class SqliteSourceReader(DBAPISourceReader):
+    """
+    Reader for a local SQLite database standing in for MSSQL (tests)
+    
+    The few T-SQL constructs of the sync queries are translated: SELECT TOP n
+    becomes LIMIT n, the INFORMATION_SCHEMA.COLUMNS structure lookup is
+    answered from PRAGMA table_info and LEN is added as a function. SQL
+    Server catalog views (sys.*, OBJECT_ID) do not exist; their callers fall
+    back to COUNT(*) and reading the structure per table. Values are decoded with the column types like
+    command line output, so rows have the same Python types as with a driver.
+    """
+    
+    name = 'sqlite'
+    
+    def __init__(self, path: str):
+        super().__init__(lambda: self._open(path))
+    
+    @staticmethod
+    def _open(path: str):
+        connection = sqlite3.connect(path, check_same_thread=False)
+        # LEN ignores trailing spaces like in SQL Server (used by --reconcile fingerprints)
+        connection.create_function('LEN', 1, lambda value: None if value is None else len(str(value).rstrip(' ')))
+        return connection
+    
+    def execute(self, query: str, column_types: Optional[List[str]] = None) -> List[tuple]:
+        """Execute a sync query translated to SQLite and decode its rows"""
+        columns_lookup = _COLUMNS_LOOKUP_PATTERN.search(query)
+        if columns_lookup:
+            return self._get_columns(columns_lookup.group(1))
+        
+        rows = super().execute(self.translate(query))
+        if not column_types:
+            return rows
+        
+        decoders = build_text_decoders(column_types)
+        return [decode_text_row([None if value is None else str(value) for value in row], decoders)
+                for row in rows]
+    
+    @staticmethod
+    def translate(query: str) -> str:
+        """Rewrite SELECT TOP n ... as SELECT ... LIMIT n"""
+        match = _TOP_PATTERN.match(query)
+        if not match:
+            return query
+        return f"SELECT {query[match.end():].rstrip().rstrip(';')} LIMIT {match.group(1)}"
+    
+    def _get_columns(self, table_name: str) -> List[tuple]:
+        """(column, full type) rows like the INFORMATION_SCHEMA.COLUMNS lookup, from the declared types"""
+        rows = super().execute(f"PRAGMA table_info('{table_name}')")
+        return [(row[1], str(row[2]).lower()) for row in rows]
+
+
+# Text column types whose line breaks are escaped by CliSourceReader.select_list
+_ESCAPED_TEXT_TYPES = ('char', 'varchar', 'nchar', 'nvarchar', 'text', 'ntext', 'xml')
+
+# Input prompts sqlcmd may print in front of the first output line ('1> 2> ')
+_PROMPT_PREFIX = re.compile(r'^(?:\d+> )+')
+
+# Server messages printed by the clients: 'Msg 208, Level 16, ...' (sqlcmd) or 'Msg 208 (severity 16, ...' (tsql)
+_SERVER_MESSAGE = re.compile(r'Msg \d+\W+(?:Level|severity)\s+(\d+)', re.IGNORECASE)
+
+
+def _has_server_error(output: str) -> bool:
+    """Check client output for a server error message (severity above 10; lower levels are informational)"""
+    return any(int(level) > 10 for level in _SERVER_MESSAGE.findall(output))
+
+
+class CliSourceReader(SourceReader):
+    """Fallback reader running queries through the sqlcmd/tsql clients"""
+    
+    skip_patterns = ['locale is', 'charset is', 'using default charset', '---', '1>', '2>', 'COLUMN_NAME', 'Setting Production']
+    streams = True
+    
+    def __init__(self, command: List[str], client_type: str, separator: str = MSSQL_FIELD_SEPARATOR):
+        self.command = command
+        self.name = client_type
+        self.separator = separator
+    
+    def execute(self, query: str, column_types: Optional[List[str]] = None) -> List[tuple]:
+        """Run query in a client subprocess and decode its delimited output"""
+        return list(self.stream(query, column_types))
+    
+    def select_list(self, columns: List[str], column_types: Optional[List[str]] = None) -> str:
+        """
+        Build the SELECT list with line breaks of text columns replaced by control characters
+        
+        The client prints one row per line, so a line break inside a value
+        would split the row; the text decoder turns the characters back.
+        """
+        if not column_types:
+            return super().select_list(columns)
+        
+        expressions = []
+        for column, column_type in zip(columns, column_types):
+            if column_type.split('(')[0].strip().lower() in _ESCAPED_TEXT_TYPES:
+                column = (f"REPLACE(REPLACE(CAST({column} AS NVARCHAR(MAX)), "
+                          f"CHAR(13), CHAR({ord(CLIENT_CR_ESCAPE)})), CHAR(10), CHAR({ord(CLIENT_LF_ESCAPE)}))")
+            expressions.append(column)
+        return ', '.join(expressions)
+    
+    def stream(self, query: str, column_types: Optional[List[str]] = None) -> Iterator[tuple]:
+        """
+        Run query in a client subprocess and yield rows while it is running
+        
+        Output is read line by line instead of buffered until the client
+        exits, so memory stays flat and the first rows are available right
+        away. A client failure (non-zero exit code or a server error message
+        on stderr) or a row that cannot be decoded is raised
+        after the rows read so far. Closing the generator early kills the
+        client.
+        """
+        # stderr goes to a file so a chatty client cannot block on a full pipe
+        stderr_file = tempfile.TemporaryFile(mode='w+')
+        process = subprocess.Popen(
+            self.command,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=stderr_file,
+            text=True
+        )
+        
+        try:
+            process.stdin.write(f"SET NOCOUNT ON;\n{query}\nGO\n")
+            process.stdin.close()
+            
+            decoders = build_text_decoders(column_types) if column_types else None
+            column_count = len(column_types) if column_types else None
+            for values in self._parse_output_lines(process.stdout, column_count):
+                if decoders is None:
+                    yield values
+                    continue
+                try:
+                    row = decode_text_row(values, decoders)
+                except ValueError as e:
+                    # Fail the batch instead of dropping the row; the sync resumes from its checkpoint
+                    raise ValueError(f"Could not decode row {values[:1]}: {e}") from e
+                yield row
+            
+            # tsql reports T-SQL errors ('Msg 208 (severity 16, ...') on stderr but still exits 0
+            returncode = process.wait()
+            stderr_file.seek(0)
+            errors = stderr_file.read()
+            if returncode != 0 or _has_server_error(errors):
+                raise RuntimeError(f"MSSQL query failed: {errors}")
+        finally:
+            if process.poll() is None:
+                process.kill()
+                process.wait()
+            process.stdout.close()
+            stderr_file.close()
+    
+    def _parse_output_lines(self, lines: Iterable[str], column_count: Optional[int] = None) -> Iterator[List[Optional[str]]]:
+        """
+        Split client output lines into rows of column values
+        
+        Columns are split on the field separator, never on whitespace, so text
+        values keep their spaces. Input prompts echoed in front of a line are
+        removed. Line breaks of text columns read through select_list arrive
+        escaped; for other queries, when the column count is known, a line with
+        too few fields is a value containing a newline and is joined with the
+        following line; an incomplete row at the end of the output raises
+        ValueError.
+        """
+        pending = None
+        
+        for line in lines:
+            line = _PROMPT_PREFIX.sub('', line.rstrip('\n').rstrip('\r'))
+            
+            if pending is not None:
+                line = f"{pending}\n{line}"
+                pending = None
+            
+            if self.separator in line or (column_count == 1 and line.strip()):
+                values = line.split(self.separator)
+                if column_count and len(values) < column_count:
+                    pending = line
+                    continue
+            else:
+                # Client messages and single values such as COUNT results
+                line = line.strip()
+                
+                if not line:
+                    continue
+                
+                if any(pattern in line for pattern in self.skip_patterns):
+                    continue
+                
+                if line.startswith('(') and ('rows affected' in line or 'row affected' in line):
+                    continue
+                
+                values = [line]
+            
+            yield [None if value == 'NULL' else value for value in values]
+        
+        if pending is not None:
+            raise ValueError(f"Incomplete row at end of output: {pending[:80]!r}")
+
+
+def _driver_available(module_name: str) -> bool:
+    """Check whether a Python driver module can be imported"""
+    try:
+        __import__(module_name)
+        return True
+    except ImportError:
+        return False
+
+
+def create_source_reader(config) -> SourceReader:
+    """
+    Create the source reader selected by configuration
+    
+    MSSQL_DRIVER selects the reader: 'auto' (default) prefers pymssql, then
+    pyodbc, then the sqlcmd/tsql command line clients; 'pymssql', 'pyodbc',
+    'cli' and 'sqlite' force a specific reader.
+    
+    Args:
+        config: DatabaseConfig instance
+    
+    Returns:
+        SourceReader instance (not yet connected)
+    """
+    mssql_config = config.get_mssql_config()
+    driver = (mssql_config.get('driver') or 'auto').lower()
+    
+    if driver == 'sqlite':
+        path = mssql_config.get('sqlite_path')
+        if not path:
+            raise RuntimeError("MSSQL_DRIVER=sqlite requires MSSQL_SQLITE_PATH")
+        return SqliteSourceReader(path)
+    
+    if driver in ('auto', 'pymssql') and _driver_available('pymssql'):
+        return PymssqlSourceReader(mssql_config)
+    
+    if driver in ('auto', 'pyodbc') and _driver_available('pyodbc'):
+        return PyodbcSourceReader(mssql_config)
+    
+    if driver not in ('auto', 'cli'):
+        logger.warning(f"MSSQL driver '{driver}' is not installed, falling back to command line client")
+    
+    return CliSourceReader(config.mssql_command, config.mssql_client_type)
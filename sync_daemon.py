@@ -0,0 +1,150 @@
+"""
+Continuous sync daemon
+
+Keeps one DatabaseSyncer (configuration, MariaDB connection and source
+reader) alive and polls every table on its own interval instead of running
+the whole sync a few times a day from cron. Poll intervals adapt to the rows
+each poll finds: a table that keeps changing is polled at its base interval
+(or right away while a backlog is being drained), an idle table backs off up
+to a maximum interval. SIGTERM/SIGINT finish the table being synced and stop.
+
+Tables configured with 'partitions' are polled serially: chunk workers would
+open and close their own connections on every poll.
+"""
+import logging
+import signal
+import threading
+import time
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class TableSchedule:
+    """Polling state of one table"""
+    
+    def __init__(self, table_name: str, base_interval: float, max_interval: float, adaptive: bool = True):
+        self.table_name = table_name
+        self.base_interval = base_interval
+        self.max_interval = max(base_interval, max_interval)
+        self.adaptive = adaptive
+        self.interval = base_interval
+        self.next_run = 0.0
+        self.polls = 0
+        self.rows = 0
+    
+    def record(self, rows: int, success: bool, batch_size: int):
+        """Choose the next poll time from the rows found by the last poll"""
+        self.polls += 1
+        self.rows += rows
+        
+        if not self.adaptive:
+            self.interval = self.base_interval
+        elif not success or rows == 0:
+            self.interval = min(self.max_interval, max(self.interval, 1.0) * 2)
+        elif rows >= batch_size:
+            # More rows are probably waiting, poll again right away
+            self.interval = 0.0
+        else:
+            self.interval = self.base_interval
+        
+        self.next_run = time.monotonic() + self.interval
+
+
+class SyncDaemon:
+    """
+    Poll configured tables continuously with persistent connections
+    
+    Args:
+        syncer: DatabaseSyncer instance (connections are opened on start)
+        tables: Tables to poll (None for all configured tables)
+    """
+    
+    def __init__(self, syncer, tables: Optional[List[str]] = None):
+        self.syncer = syncer
+        self.syncer.partitioning = False
+        self.config = syncer.config
+        self.tables = tables
+        self.stop_event = threading.Event()
+        self.schedules: Dict[str, TableSchedule] = {}
+    
+    def _build_schedules(self, tables: List[str]):
+        """Create the polling schedule of every table"""
+        sync_config = self.config.sync_config
+        for table_name in tables:
+            interval = self.config.get_poll_interval(table_name)
+            # Full syncs rebuild the whole table, so they keep a fixed interval
+            adaptive = self.config.get_sync_mode(table_name) == 'incremental'
+            self.schedules[table_name] = TableSchedule(
+                table_name, interval, sync_config['daemon_max_interval'], adaptive
+            )
+            logger.info(f"Table {table_name}: polling every {interval:.0f}s"
+                        f"{' (adaptive)' if adaptive else ''}")
+    
+    def _handle_signal(self, signum, frame):
+        logger.info(f"Received signal {signum}, stopping after the current table")
+        self.stop_event.set()
+    
+    def _ensure_connected(self) -> bool:
+        """Reconnect to MariaDB if the persistent connection was lost"""
+        connection = self.syncer.mariadb_conn
+        if connection is not None:
+            try:
+                if connection.is_connected():
+                    return True
+            except Exception:
+                pass
+            logger.warning("MariaDB connection lost, reconnecting")
+        return self.syncer.connect_mariadb()
+    
+    def _poll(self, schedule: TableSchedule):
+        """Sync one table and reschedule it"""
+        table_name = schedule.table_name
+        start = time.monotonic()
+        
+        if self._ensure_connected():
+            try:
+                # Skip the COUNT(*) a one-off run uses for progress reporting
+                success = self.syncer.sync_table(table_name, total_rows=0)
+            except Exception as e:
+                logger.error(f"Table {table_name}: poll failed: {e}")
+                success = False
+        else:
+            success = False
+        
+        rows = self.syncer.table_stats.get(table_name, {}).get('rows', 0) if success else 0
+        schedule.record(rows, success, self.syncer.get_batch_size(table_name))
+        
+        logger.debug(f"Table {table_name}: {rows} rows in {time.monotonic() - start:.1f}s, "
+                     f"next poll in {schedule.interval:.0f}s")
+    
+    def run(self) -> bool:
+        """Poll tables until SIGTERM/SIGINT; returns True on a clean shutdown"""
+        tables = self.tables or self.syncer.get_table_list()
+        if not tables:
+            logger.error("No tables found to sync")
+            return False
+        
+        signal.signal(signal.SIGTERM, self._handle_signal)
+        signal.signal(signal.SIGINT, self._handle_signal)
+        
+        self._build_schedules(tables)
+        logger.info(f"=== Sync daemon started ({len(tables)} tables) ===")
+        
+        try:
+            while not self.stop_event.is_set():
+                schedule = min(self.schedules.values(), key=lambda item: item.next_run)
+                delay = schedule.next_run - time.monotonic()
+                if delay > 0:
+                    # Wakes up immediately on shutdown
+                    self.stop_event.wait(delay)
+                    continue
+                
+                self._poll(schedule)
+        finally:
+            self.syncer.close_connections()
+            for schedule in self.schedules.values():
+                logger.info(f"Table {schedule.table_name}: {schedule.polls} polls, {schedule.rows} rows")
+            logger.info("=== Sync daemon stopped ===")
+        
+        return True
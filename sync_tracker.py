@@ -1,53 +1,192 @@
 """
 Last sync timestamp tracking for incremental updates
+
+The tracker file is replaced atomically (write to a temp file, fsync, rename)
+so a crash never leaves a torn file behind, and the previous version is kept
+as `<file>.bak`. Saves take an exclusive file lock and merge the tables this
+process changed into the current file, so several sync processes can share it.
 """
 import json
+import logging
 import os
+import threading
 from datetime import datetime
 from typing import Optional
 
+from data_types import format_sql_literal
+
+try:
+    import fcntl
+except ImportError:  # Windows: no cross-process locking
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
 class SyncTracker:
     """Track last sync timestamps for incremental updates"""
     
     def __init__(self, tracker_file: str = 'last_sync.json'):
         self.tracker_file = tracker_file
+        self.backup_file = f"{tracker_file}.bak"
+        self.lock_file = f"{tracker_file}.lock"
         self.sync_data = self._load_tracker()
+        # Parallel table workers share one tracker
+        self._lock = threading.RLock()
+    
+    def _read_file(self, path: str) -> Optional[dict]:
+        """Read a tracker file, None if it does not exist"""
+        if not os.path.exists(path):
+            return None
+        with open(path, 'r') as f:
+            data = json.load(f)
+        if not isinstance(data, dict):
+            raise ValueError(f"unexpected content in {path}")
+        return data
     
     def _load_tracker(self) -> dict:
-        """Load sync tracking data from file"""
+        """
+        Load sync tracking data from file
+        
+        A corrupt file is never treated as empty (that would silently turn the
+        next run into a full sync): the backup is used instead, and if that is
+        unreadable too loading fails.
+        """
+        try:
+            data = self._read_file(self.tracker_file)
+            return data if data is not None else {}
+        except (json.JSONDecodeError, ValueError, IOError) as e:
+            logger.error(f"Sync tracker {self.tracker_file} is corrupt ({e}), trying {self.backup_file}")
+        
+        try:
+            data = self._read_file(self.backup_file)
+        except (json.JSONDecodeError, ValueError, IOError) as e:
+            data = None
+            logger.error(f"Sync tracker backup {self.backup_file} is unreadable ({e})")
+        
+        if data is None:
+            raise RuntimeError(f"Sync tracker {self.tracker_file} is corrupt and has no usable backup; "
+                               f"fix or delete it (deleting forces a full sync)")
+        
+        logger.warning(f"Restored sync tracker from {self.backup_file}")
+        return data
+    
+    def _save_tracker(self, table_name: Optional[str] = None):
+        """
+        Save sync tracking data to file
+        
+        Args:
+            table_name: Table whose entry changed; its entry is merged into the
+                file as written by other processes (None rewrites everything)
+        """
+        with self._lock:
+            lock_fd = None
+            try:
+                if fcntl:
+                    lock_fd = os.open(self.lock_file, os.O_RDWR | os.O_CREAT, 0o644)
+                    fcntl.flock(lock_fd, fcntl.LOCK_EX)
+                
+                if table_name is not None:
+                    try:
+                        on_disk = self._read_file(self.tracker_file) or {}
+                    except (json.JSONDecodeError, ValueError, IOError) as e:
+                        # Never treat a corrupt file as empty: that would drop every other table's watermark
+                        logger.error(f"Sync tracker {self.tracker_file} is corrupt ({e}), rewriting it from memory")
+                        on_disk = dict(self.sync_data)
+                    if table_name in self.sync_data:
+                        on_disk[table_name] = self.sync_data[table_name]
+                    else:
+                        on_disk.pop(table_name, None)
+                    self.sync_data = on_disk
+                
+                self._write_atomic(self.sync_data)
+            except (IOError, OSError) as e:
+                logger.warning(f"Could not save sync tracker: {e}")
+            finally:
+                if lock_fd is not None:
+                    fcntl.flock(lock_fd, fcntl.LOCK_UN)
+                    os.close(lock_fd)
+    
+    def _write_atomic(self, data: dict):
+        """Write data to a temp file, fsync it and rename it over the tracker file"""
+        directory = os.path.dirname(os.path.abspath(self.tracker_file))
+        temp_file = f"{self.tracker_file}.tmp.{os.getpid()}"
+        
+        with open(temp_file, 'w') as f:
+            json.dump(data, f, indent=2, default=str)
+            f.flush()
+            os.fsync(f.fileno())
+        
+        # Keep the previous version as backup (hard link, no copy)
         if os.path.exists(self.tracker_file):
+            backup_temp = f"{self.backup_file}.tmp.{os.getpid()}"
             try:
-                with open(self.tracker_file, 'r') as f:
-                    return json.load(f)
-            except (json.JSONDecodeError, IOError):
+                if os.path.exists(backup_temp):
+                    os.unlink(backup_temp)
+                os.link(self.tracker_file, backup_temp)
+                os.replace(backup_temp, self.backup_file)
+            except OSError:
                 pass
-        return {}
-    
-    def _save_tracker(self):
-        """Save sync tracking data to file"""
+        
+        os.replace(temp_file, self.tracker_file)
+        
+        dir_fd = os.open(directory, os.O_RDONLY)
         try:
-            with open(self.tracker_file, 'w') as f:
-                json.dump(self.sync_data, f, indent=2, default=str)
-        except IOError as e:
-            print(f"Warning: Could not save sync tracker: {e}")
+            os.fsync(dir_fd)
+        except OSError:
+            pass
+        finally:
+            os.close(dir_fd)
     
     def get_last_sync(self, table_name: str) -> Optional[str]:
         """Get last sync timestamp for a table"""
         return self.sync_data.get(table_name, {}).get('last_sync')
     
+    def get_last_sync_key(self, table_name: str):
+        """Get the primary key stored with the last sync timestamp"""
+        return self.sync_data.get(table_name, {}).get('last_sync_key')
+    
     def set_last_sync(self, table_name: str, timestamp: str):
         """Set last sync timestamp for a table"""
-        if table_name not in self.sync_data:
-            self.sync_data[table_name] = {}
+        with self._lock:
+            if table_name not in self.sync_data:
+                self.sync_data[table_name] = {}
+            
+            self.sync_data[table_name]['last_sync'] = timestamp
+            self.sync_data[table_name]['updated_at'] = datetime.now().isoformat()
+            self._save_tracker(table_name)
+    
+    def complete_sync(self, table_name: str, last_sync: Optional[str] = None, last_sync_key=None):
+        """
+        Finish an incremental table sync in a single save
         
-        self.sync_data[table_name]['last_sync'] = timestamp
-        self.sync_data[table_name]['updated_at'] = datetime.now().isoformat()
-        self._save_tracker()
+        Drops the resume key and chunk progress and, when given, advances the
+        (timestamp, primary key) watermark, so a crash can never leave the
+        watermark advanced with a stale resume point or the other way round.
+        """
+        with self._lock:
+            if table_name not in self.sync_data and last_sync is None:
+                return
+            
+            entry = self.sync_data.setdefault(table_name, {})
+            entry.pop('resume_key', None)
+            entry.pop('chunks', None)
+            if last_sync is not None:
+                entry['last_sync'] = last_sync
+                entry['last_sync_key'] = last_sync_key
+                entry['updated_at'] = datetime.now().isoformat()
+            self._save_tracker(table_name)
     
     def get_incremental_condition(self, table_name: str, timestamp_column: str, 
-                                 base_condition: Optional[str] = None) -> str:
-        """Build incremental sync condition"""
+                                 base_condition: Optional[str] = None, key_column: Optional[str] = None) -> str:
+        """
+        Build incremental sync condition
+        
+        With a stored watermark key the condition is the composite cursor
+        (timestamp > last OR (timestamp = last AND key > last_key)), so rows
+        sharing the last synced timestamp are not skipped.
+        """
         last_sync = self.get_last_sync(table_name)
+        last_sync_key = self.sync_data.get(table_name, {}).get('last_sync_key')
         
         conditions = []
         
@@ -56,13 +195,117 @@ class SyncTracker:
             conditions.append(f"({base_condition})")
         
         # Add incremental condition
-        if last_sync:
+        if last_sync and key_column and last_sync_key is not None:
+            conditions.append(f"({timestamp_column} > '{last_sync}' OR "
+                              f"({timestamp_column} = '{last_sync}' AND {key_column} > {format_sql_literal(last_sync_key)}))")
+        elif last_sync:
             conditions.append(f"{timestamp_column} > '{last_sync}'")
         
         return " AND ".join(conditions) if conditions else ""
     
+    def get_resume_key(self, table_name: str):
+        """Get the last committed primary key of an unfinished table sync"""
+        return self.sync_data.get(table_name, {}).get('resume_key')
+    
+    def set_resume_key(self, table_name: str, key):
+        """Record the last committed primary key so an interrupted sync can resume"""
+        with self._lock:
+            if table_name not in self.sync_data:
+                self.sync_data[table_name] = {}
+            
+            self.sync_data[table_name]['resume_key'] = key
+            self._save_tracker(table_name)
+    
+    def clear_resume_key(self, table_name: str):
+        """Clear the resume point after a table sync completes"""
+        with self._lock:
+            if 'resume_key' in self.sync_data.get(table_name, {}):
+                del self.sync_data[table_name]['resume_key']
+                self._save_tracker(table_name)
+    
+    def get_chunks(self, table_name: str) -> list:
+        """Get saved key range chunk progress of an unfinished partitioned sync"""
+        return self.sync_data.get(table_name, {}).get('chunks', [])
+    
+    def set_chunks(self, table_name: str, chunks: list):
+        """Save the key range chunk plan of a partitioned sync"""
+        with self._lock:
+            if table_name not in self.sync_data:
+                self.sync_data[table_name] = {}
+            
+            self.sync_data[table_name]['chunks'] = [dict(chunk) for chunk in chunks]
+            self._save_tracker(table_name)
+    
+    def update_chunk(self, table_name: str, index: int, **fields):
+        """Record progress (last_key, done) of one chunk"""
+        with self._lock:
+            chunks = self.sync_data.get(table_name, {}).get('chunks')
+            if chunks and index < len(chunks):
+                chunks[index].update(fields)
+                self._save_tracker(table_name)
+    
+    def clear_chunks(self, table_name: str):
+        """Clear chunk progress after all chunks completed"""
+        with self._lock:
+            if 'chunks' in self.sync_data.get(table_name, {}):
+                del self.sync_data[table_name]['chunks']
+                self._save_tracker(table_name)
+    
+    def get_change_version(self, table_name: str) -> Optional[int]:
+        """Get the Change Tracking/rowversion version of the last sync"""
+        return self.sync_data.get(table_name, {}).get('change_version')
+    
+    def set_change_version(self, table_name: str, version: int):
+        """Record the version the table is synced up to"""
+        with self._lock:
+            if table_name not in self.sync_data:
+                self.sync_data[table_name] = {}
+            
+            self.sync_data[table_name]['change_version'] = version
+            self.sync_data[table_name]['updated_at'] = datetime.now().isoformat()
+            self._save_tracker(table_name)
+    
+    def has_row_hashes(self, table_name: str) -> bool:
+        """Check if the row checksum baseline of a table is complete"""
+        return bool(self.sync_data.get(table_name, {}).get('row_hashes'))
+    
+    def set_row_hashes(self, table_name: str):
+        """Mark the row checksum baseline of a table as complete"""
+        with self._lock:
+            if table_name not in self.sync_data:
+                self.sync_data[table_name] = {}
+            
+            self.sync_data[table_name]['row_hashes'] = True
+            self.sync_data[table_name]['updated_at'] = datetime.now().isoformat()
+            self._save_tracker(table_name)
+    
+    def clear_row_hashes(self, table_name: str):
+        """Mark the row checksum baseline of a table as missing (next sync writes every row)"""
+        with self._lock:
+            if 'row_hashes' in self.sync_data.get(table_name, {}):
+                del self.sync_data[table_name]['row_hashes']
+                self._save_tracker(table_name)
+    
+    def get_batch_size(self, table_name: str) -> Optional[int]:
+        """Get the batch size the last sync of a table settled on"""
+        return self.sync_data.get(table_name, {}).get('batch_size')
+    
+    def set_batch_size(self, table_name: str, batch_size: int):
+        """Record the tuned batch size so the next sync starts from it"""
+        with self._lock:
+            if table_name not in self.sync_data:
+                self.sync_data[table_name] = {}
+            
+            self.sync_data[table_name]['batch_size'] = batch_size
+            self._save_tracker(table_name)
+    
     def clear_last_sync(self, table_name: str):
         """Clear last sync timestamp (force full sync)"""
-        if table_name in self.sync_data:
-            del self.sync_data[table_name]
-            self._save_tracker()
\ No newline at end of file
+        with self._lock:
+            if table_name in self.sync_data:
+                # The tuned batch size is not sync progress, keep it
+                batch_size = self.sync_data[table_name].get('batch_size')
+                del self.sync_data[table_name]
+                if batch_size:
+                    self.sync_data[table_name] = {'batch_size': batch_size}
+                self._save_tracker(table_name)
\ No newline at end of file
@@ -0,0 +1,279 @@
+"""
+Target writers for loading batches into MariaDB
+
+A writer receives cleaned batches for one table and reports the primary key
+up to which rows are committed, so checkpoints never run ahead of the data.
+"""
+import logging
+import os
+import tempfile
+from datetime import date, datetime, time, timedelta
+from decimal import Decimal
+from typing import Any, List, Optional
+
+from mysql.connector import Error as MySQLError
+
+from columnar import ColumnBatch, as_rows
+
+logger = logging.getLogger(__name__)
+
+# MySQL client/server errors raised when LOAD DATA LOCAL INFILE is disabled
+LOCAL_INFILE_DISABLED_ERRORS = (1148, 2068, 3948)
+
+
+class TargetWriter:
+    """Interface for writing cleaned batches to a MariaDB table"""
+    
+    name = 'base'
+    
+    def __init__(self, connection, table_name: str, columns: List[str], commit_rows: int = 0):
+        self.connection = connection
+        self.table_name = table_name
+        self.columns = columns
+        self.commit_rows = commit_rows
+        self._uncommitted_rows = 0
+        self._uncommitted_key = None
+    
+    def _commit_if_due(self, rows: int, last_key) -> Optional[Any]:
+        """Count written rows and commit once commit_rows is reached (0 = every batch)"""
+        self._uncommitted_rows += rows
+        self._uncommitted_key = last_key
+        if self._uncommitted_rows >= self.commit_rows:
+            return self._commit()
+        return None
+    
+    def _commit(self) -> Optional[Any]:
+        self.connection.commit()
+        self._uncommitted_rows = 0
+        return self._uncommitted_key
+    
+    def write(self, rows: List[tuple], last_key) -> Optional[Any]:
+        """
+        Write a batch of rows
+        
+        Returns:
+            Last primary key that is now committed, or None if rows are still buffered
+        """
+        raise NotImplementedError
+    
+    def flush(self) -> Optional[Any]:
+        """Commit buffered rows and return the last committed key"""
+        return self._commit()
+    
+    def close(self):
+        """Release resources without committing buffered rows"""
+        pass
+
+
+class ExecuteManyWriter(TargetWriter):
+    """Writes each batch with cursor.executemany and commits it"""
+    
+    name = 'executemany'
+    
+    def __init__(self, connection, table_name: str, columns: List[str], sql_template: str, commit_rows: int = 0):
+        super().__init__(connection, table_name, columns, commit_rows)
+        self.sql_template = sql_template
+        self.cursor = connection.cursor()
+    
+    def write(self, rows: List[tuple], last_key) -> Optional[Any]:
+        rows = as_rows(rows)
+        if rows:
+            self.cursor.executemany(self.sql_template, rows)
+        return self._commit_if_due(len(rows), last_key)
+    
+    def close(self):
+        self.cursor.close()
+
+
+def _estimate_row_bytes(row) -> int:
+    """Upper estimate of a row's size in a statement (4 bytes per character covers UTF-8 and escaping)"""
+    return sum(len(value) * 4 + 3 if isinstance(value, (str, bytes)) else 32 for value in row) + 4
+
+
+class MultiRowWriter(TargetWriter):
+    """
+    Writes batches as multi-row INSERT ... VALUES (...), (...) statements
+    
+    Each statement is sized to stay under max_allowed_packet; with an update
+    clause the statements become multi-row upserts.
+    """
+    
+    name = 'multirow'
+    
+    def __init__(self, connection, table_name: str, columns: List[str], max_allowed_packet: int,
+                 update_clause: Optional[str] = None, commit_rows: int = 0):
+        super().__init__(connection, table_name, columns, commit_rows)
+        self.prefix = f"INSERT INTO `{table_name}` (`{'`, `'.join(columns)}`) VALUES "
+        self.suffix = f" ON DUPLICATE KEY UPDATE {update_clause}" if update_clause else ''
+        self.row_placeholder = f"({', '.join(['%s'] * len(columns))})"
+        # Keep a margin below the server limit for the protocol header
+        self.max_statement_bytes = max(64 * 1024, max_allowed_packet - 64 * 1024)
+        self.cursor = connection.cursor()
+        self.statements = 0
+    
+    def write(self, rows: List[tuple], last_key) -> Optional[Any]:
+        rows = as_rows(rows)
+        base_size = len(self.prefix) + len(self.suffix)
+        statement_rows = []
+        size = base_size
+        
+        for row in rows:
+            row_size = _estimate_row_bytes(row)
+            if statement_rows and size + row_size > self.max_statement_bytes:
+                self._execute(statement_rows)
+                statement_rows = []
+                size = base_size
+            statement_rows.append(row)
+            size += row_size
+        
+        if statement_rows:
+            self._execute(statement_rows)
+        
+        return self._commit_if_due(len(rows), last_key)
+    
+    def _execute(self, rows: List[tuple]):
+        sql = self.prefix + ', '.join([self.row_placeholder] * len(rows)) + self.suffix
+        self.cursor.execute(sql, [value for row in rows for value in row])
+        self.statements += 1
+    
+    def close(self):
+        self.cursor.close()
+
+
+def _escape_tsv_value(value) -> bytes:
+    """Encode one value in LOAD DATA default format (tab separated, backslash escaped)"""
+    if value is None:
+        return b'\\N'
+    if isinstance(value, bool):
+        return b'1' if value else b'0'
+    if isinstance(value, (int, float, Decimal)):
+        return str(value).encode()
+    if isinstance(value, (datetime, date, time, timedelta)):
+        return str(value).encode()
+    if isinstance(value, (bytes, bytearray)):
+        data = bytes(value)
+    else:
+        data = str(value).encode('utf-8')
+    return (data.replace(b'\\', b'\\\\').replace(b'\t', b'\\t').replace(b'\n', b'\\n')
+            .replace(b'\r', b'\\r').replace(b'\x00', b'\\0'))
+
+
+def encode_tsv_row(row) -> bytes:
+    """Encode a row as one LOAD DATA line"""
+    return b'\t'.join(_escape_tsv_value(value) for value in row) + b'\n'
+
+
+def _encode_tsv_column(values: list, category: str) -> List[bytes]:
+    """Encode one column of a ColumnBatch, with dedicated loops for integer, datetime and text columns"""
+    if category == 'integer':
+        return [b'%d' % value if value.__class__ is int else _escape_tsv_value(value) for value in values]
+    
+    if category == 'datetime':
+        return [str(value).encode() if value.__class__ is datetime else _escape_tsv_value(value) for value in values]
+    
+    if category == 'text':
+        return [
+            value.encode('utf-8').replace(b'\\', b'\\\\').replace(b'\t', b'\\t').replace(b'\n', b'\\n')
+            .replace(b'\r', b'\\r').replace(b'\x00', b'\\0')
+            if value.__class__ is str else _escape_tsv_value(value)
+            for value in values
+        ]
+    
+    return [_escape_tsv_value(value) for value in values]
+
+
+def encode_tsv_columns(batch: ColumnBatch) -> bytes:
+    """Encode a ColumnBatch as LOAD DATA lines, one column at a time"""
+    if not batch.row_count:
+        return b''
+    encoded = [_encode_tsv_column(values, category) for values, category in zip(batch.columns, batch.categories)]
+    return b'\n'.join(map(b'\t'.join, zip(*encoded))) + b'\n'
+
+
+class BulkLoadWriter(TargetWriter):
+    """
+    Spools batches to a TSV file and loads them with LOAD DATA LOCAL INFILE
+    
+    Rows are buffered until bulk_rows is reached. If the server or client
+    refuses local infile, the buffered rows and all later batches are written
+    with the executemany fallback instead. ColumnBatch batches are encoded
+    column by column.
+    """
+    
+    name = 'bulk'
+    
+    def __init__(self, connection, table_name: str, columns: List[str], fallback: ExecuteManyWriter,
+                 bulk_rows: int = 50000):
+        super().__init__(connection, table_name, columns)
+        self.fallback = fallback
+        self.bulk_rows = bulk_rows
+        self.use_fallback = False
+        self._spool = None
+        self._pending_batches = []
+        self._pending_count = 0
+        self._pending_key = None
+    
+    def write(self, rows: List[tuple], last_key) -> Optional[Any]:
+        if self.use_fallback:
+            return self.fallback.write(rows, last_key)
+        
+        if self._spool is None:
+            self._spool = tempfile.NamedTemporaryFile(prefix=f"{self.table_name}_", suffix='.tsv', delete=False)
+        
+        if isinstance(rows, ColumnBatch):
+            self._spool.write(encode_tsv_columns(rows))
+        else:
+            self._spool.write(b''.join(encode_tsv_row(row) for row in rows))
+        # Kept for the executemany fallback
+        self._pending_batches.append(rows)
+        self._pending_count += len(rows)
+        self._pending_key = last_key
+        
+        if self._pending_count >= self.bulk_rows:
+            return self.flush()
+        return None
+    
+    def flush(self) -> Optional[Any]:
+        if self.use_fallback:
+            return self.fallback.flush()
+        if self._spool is None:
+            return self._pending_key
+        
+        path = self._spool.name
+        self._spool.close()
+        self._spool = None
+        batches, last_key = self._pending_batches, self._pending_key
+        self._pending_batches = []
+        self._pending_count = 0
+        
+        try:
+            cursor = self.connection.cursor()
+            try:
+                cursor.execute(
+                    f"LOAD DATA LOCAL INFILE '{path}' INTO TABLE `{self.table_name}` "
+                    "CHARACTER SET utf8mb4 FIELDS TERMINATED BY '\\t' ESCAPED BY '\\\\' "
+                    f"LINES TERMINATED BY '\\n' (`{'`, `'.join(self.columns)}`)"
+                )
+                self.connection.commit()
+            finally:
+                cursor.close()
+            return last_key
+        
+        except MySQLError as e:
+            if getattr(e, 'errno', None) not in LOCAL_INFILE_DISABLED_ERRORS:
+                raise
+            logger.warning(f"LOAD DATA LOCAL INFILE unavailable for {self.table_name} ({e}), using executemany")
+            self.use_fallback = True
+            self.fallback.write([row for batch in batches for row in as_rows(batch)], last_key)
+            return self.fallback.flush()
+        
+        finally:
+            os.unlink(path)
+    
+    def close(self):
+        if self._spool is not None:
+            path = self._spool.name
+            self._spool.close()
+            self._spool = None
+            os.unlink(path)
+        self.fallback.close()
@@ -0,0 +1,146 @@
+"""
+Shared fixtures: a SQLite database standing in for MSSQL, and a recording
+or SQLite backed stand-in for the MariaDB connection
+"""
+import os
+import sqlite3
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+SOURCE_ROWS = [
+    (1, 'Line A', '2025-04-01 08:30:00.000', 5, 1),
+    (2, 'Line B', '2025-04-01 09:00:00.000', 7, 0),
+    (3, 'Line A', '2025-04-02 10:15:00.000', None, 1),
+    (4, 'Line C', '2025-04-02 11:00:00.000', 3, 1),
+    (5, 'Line B', None, 9, 0),
+]
+
+
+class RecordingCursor:
+    """Cursor recording the statements sent to MariaDB"""
+    
+    def __init__(self, connection):
+        self.connection = connection
+    
+    def execute(self, sql, params=None):
+        self.connection.statements.append((sql, params))
+    
+    def executemany(self, sql, rows):
+        self.connection.statements.append((sql, None))
+        self.connection.rows.extend(rows)
+    
+    def fetchone(self):
+        return None
+    
+    def fetchall(self):
+        return []
+    
+    def close(self):
+        pass
+
+
+class RecordingConnection:
+    """MariaDB connection stand-in keeping written rows and statements"""
+    
+    def __init__(self):
+        self.rows = []
+        self.statements = []
+        self.commits = 0
+    
+    def cursor(self):
+        return RecordingCursor(self)
+    
+    def commit(self):
+        self.commits += 1
+    
+    def close(self):
+        pass
+
+
+class SqliteTargetConnection:
+    """SQLite database answering MariaDB queries (DIV, CHAR_LENGTH), recording the statements"""
+    
+    def __init__(self, path: str):
+        self.connection = sqlite3.connect(path)
+        self.connection.create_function('CHAR_LENGTH', 1, lambda value: None if value is None else len(value))
+        self.statements = []
+    
+    def cursor(self):
+        return SqliteTargetCursor(self)
+    
+    def commit(self):
+        self.connection.commit()
+    
+    def close(self):
+        self.connection.close()
+
+
+class SqliteTargetCursor:
+    def __init__(self, target):
+        self.target = target
+        self.cursor = target.connection.cursor()
+    
+    def execute(self, sql, params=None):
+        self.target.statements.append(sql)
+        self.cursor.execute(sql.replace(' DIV ', ' / ').replace('%s', '?'), params or ())
+    
+    def fetchone(self):
+        return self.cursor.fetchone()
+    
+    def fetchall(self):
+        return self.cursor.fetchall()
+    
+    def close(self):
+        self.cursor.close()
+
+
+def create_items(path: str, rows):
+    """Create table T_Item (ID, X01 text, X05 int, X09 bit) with rows in a SQLite database"""
+    connection = sqlite3.connect(path)
+    connection.execute("CREATE TABLE T_Item (ID INT PRIMARY KEY, X01 NVARCHAR(50), X05 INT, X09 BIT)")
+    connection.executemany("INSERT INTO T_Item VALUES (?, ?, ?, ?)", rows)
+    connection.commit()
+    connection.close()
+
+
+@pytest.fixture
+def sqlite_path(tmp_path):
+    """SQLite source with one table T_Line of SOURCE_ROWS"""
+    path = str(tmp_path / 'source.db')
+    connection = sqlite3.connect(path)
+    connection.execute("CREATE TABLE T_Line (ID INT PRIMARY KEY, X01 NVARCHAR(50), X02 DATETIME, X05 INT, X09 BIT)")
+    connection.executemany("INSERT INTO T_Line VALUES (?, ?, ?, ?, ?)", SOURCE_ROWS)
+    connection.commit()
+    connection.close()
+    return path
+
+
+@pytest.fixture
+def syncer(tmp_path, monkeypatch, sqlite_path):
+    """DatabaseSyncer reading T_Line from SQLite and writing to a RecordingConnection"""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv('MSSQL_DRIVER', 'sqlite')
+    monkeypatch.setenv('MSSQL_SQLITE_PATH', sqlite_path)
+    monkeypatch.setenv('MARIADB_DATABASE', 'test')
+    
+    from db_sync import DatabaseSyncer
+    
+    instance = DatabaseSyncer()
+    instance.config.table_sync_config = {
+        'T_Line': {
+            'sync': True,
+            'columns': None,
+            'condition': None,
+            'sync_mode': 'full',
+            'timestamp_column': None,
+            'primary_key': 'ID',
+            'column_mapping': {'X01': 'line', 'X02': 'date'}
+        }
+    }
+    instance.config.sync_config.update({'batch_size': 2, 'min_batch_size': 2, 'max_batch_size': 2})
+    instance.mariadb_conn = RecordingConnection()
+    yield instance
+    instance.close_connections()
@@ -0,0 +1,60 @@
+"""Tests for change based incremental sync replayed from a recorded changes fixture"""
+import os
+from datetime import datetime
+
+import pytest
+
+FIXTURE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures', 't_line_changes.json')
+
+
+@pytest.fixture
+def change_syncer(syncer):
+    """Syncer with T_Line as a Change Tracking table replayed from FIXTURE"""
+    syncer.config.mssql_config['changes_fixture'] = FIXTURE
+    syncer.config.table_sync_config['T_Line'].update({
+        'sync_mode': 'incremental',
+        'incremental_source': 'change_tracking'
+    })
+    return syncer
+
+
+def deleted_keys(connection):
+    return [params for sql, params in connection.statements if sql.startswith('DELETE FROM `T_Line`')]
+
+
+def test_sync_changes_applies_net_changes_since_stored_version(change_syncer):
+    change_syncer.sync_tracker.set_change_version('T_Line', 10)
+    columns = change_syncer.get_table_structure('T_Line')
+    
+    assert change_syncer.sync_table_data('T_Line', columns)
+    
+    connection = change_syncer.mariadb_conn
+    assert connection.rows == [
+        (2, 'Line B2', datetime(2025, 4, 1, 9, 0), 10, 1),
+        (6, 'Line D', datetime(2025, 4, 3, 7, 45), 2, 1),
+    ]
+    assert deleted_keys(connection) == [[4]]
+    assert 'ON DUPLICATE KEY UPDATE' in connection.statements[0][0]
+    assert change_syncer.sync_tracker.get_change_version('T_Line') == 13
+
+
+def test_sync_changes_copies_table_when_version_too_old(change_syncer):
+    change_syncer.sync_tracker.set_change_version('T_Line', 2)
+    columns = change_syncer.get_table_structure('T_Line')
+    
+    assert change_syncer.sync_table_data('T_Line', columns)
+    
+    connection = change_syncer.mariadb_conn
+    assert [row[0] for row in connection.rows] == [1, 2, 3, 4, 5]
+    assert deleted_keys(connection) == []
+    assert change_syncer.sync_tracker.get_change_version('T_Line') == 13
+
+
+def test_sync_changes_without_changes_keeps_version(change_syncer):
+    change_syncer.sync_tracker.set_change_version('T_Line', 13)
+    columns = change_syncer.get_table_structure('T_Line')
+    
+    assert change_syncer.sync_table_data('T_Line', columns)
+    
+    assert change_syncer.mariadb_conn.rows == []
+    assert change_syncer.sync_tracker.get_change_version('T_Line') == 13
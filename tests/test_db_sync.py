@@ -0,0 +1,50 @@
+"""Tests for DatabaseSyncer failure handling"""
+import pytest
+
+from source_reader import SqliteSourceReader
+
+
+def fail_after_batches(monkeypatch, batches: int):
+    """Make batch queries of the SQLite reader fail after the given number of batches"""
+    execute = SqliteSourceReader.execute
+    calls = []
+    
+    def failing_execute(self, query, column_types=None):
+        if 'TOP' in query and 'ORDER BY' in query:
+            calls.append(query)
+            if len(calls) > batches:
+                raise RuntimeError("connection reset")
+        return execute(self, query, column_types)
+    
+    monkeypatch.setattr(SqliteSourceReader, 'execute', failing_execute)
+
+
+def test_source_error_mid_table_fails_sync(syncer, monkeypatch):
+    columns = syncer.get_table_structure('T_Line')
+    fail_after_batches(monkeypatch, 1)
+    
+    assert not syncer.sync_table_data('T_Line', columns, target_table='T_Line__staging')
+
+
+def test_key_bounds_error_is_raised(syncer, monkeypatch):
+    columns = syncer.get_table_structure('T_Line')
+    plan = {'table_name': 'T_Line', 'column_types': [col_type for _, col_type in columns], 'key_index': 0}
+    monkeypatch.setattr(SqliteSourceReader, 'execute', lambda self, query, column_types=None: 1 / 0)
+    
+    with pytest.raises(ZeroDivisionError):
+        syncer._get_key_bounds(plan)
+
+
+def test_fetch_stage_reuses_the_callers_reader(syncer, monkeypatch):
+    import db_sync
+    
+    columns = syncer.get_table_structure('T_Line')
+    reader = syncer.source_reader
+    created = []
+    monkeypatch.setattr(db_sync, 'create_source_reader', lambda config: created.append(config) or reader)
+    
+    for _ in range(3):
+        assert syncer.sync_table_data('T_Line', columns, target_table='T_Line__staging')
+    
+    assert created == []
+    assert syncer.source_reader is reader
@@ -0,0 +1,86 @@
+"""Tests for propagating MSSQL deletes to incremental tables"""
+import pytest
+
+from conftest import SqliteTargetConnection, create_items
+from delete_sync import find_orphan_ranges
+
+TARGET_KEYS = list(range(1, 41)) + list(range(71, 81))
+DELETED_KEYS = [5, 6, 18, 33, 72]
+
+
+def item_rows(keys):
+    return [(key, f"Item {key}", key * 10, key % 2) for key in keys]
+
+
+@pytest.fixture
+def delete_syncer(syncer, sqlite_path, tmp_path):
+    """Syncer whose MariaDB copy of T_Item still has rows deleted from the SQLite source"""
+    create_items(sqlite_path, item_rows(key for key in TARGET_KEYS if key not in DELETED_KEYS))
+    syncer.config.table_sync_config['T_Item'] = {'sync': True, 'sync_mode': 'incremental', 'primary_key': 'ID'}
+    
+    target_path = str(tmp_path / 'target.db')
+    create_items(target_path, item_rows(TARGET_KEYS))
+    syncer.mariadb_conn = SqliteTargetConnection(target_path)
+    yield syncer
+    syncer.mariadb_conn.close()
+
+
+def delete_plan(syncer) -> dict:
+    columns = syncer.get_table_structure('T_Item')
+    return {'table_name': 'T_Item', 'target_table': 'T_Item', 'key_index': 0,
+            'target_columns': [name for name, _ in columns], 'column_types': [col_type for _, col_type in columns]}
+
+
+def target_keys(syncer):
+    cursor = syncer.mariadb_conn.cursor()
+    cursor.execute("SELECT ID FROM T_Item ORDER BY ID")
+    keys = [row[0] for row in cursor.fetchall()]
+    cursor.close()
+    return keys
+
+
+def delete_statements(syncer):
+    return [sql for sql in syncer.mariadb_conn.statements if sql.startswith('DELETE')]
+
+
+def test_find_orphan_ranges_across_windows(delete_syncer):
+    reader = delete_syncer.source_reader
+    source_queries = []
+    execute = reader.execute
+    reader.execute = lambda query, column_types=None: source_queries.append(query) or execute(query, column_types)
+    
+    orphans = find_orphan_ranges(reader, delete_syncer.mariadb_conn, 'T_Item', 'ID', 'ID', window=10)
+    
+    assert orphans == [(5, 6), (18, 18), (33, 33), (72, 72)]
+    # Windows 41-50 .. 61-70 have no target rows and send no source query
+    assert len(source_queries) == 5
+
+
+def test_propagate_deletes_removes_only_orphans(delete_syncer):
+    delete_syncer.config.sync_config['max_deletes'] = 10
+    
+    assert delete_syncer._propagate_deletes(delete_plan(delete_syncer)) == 5
+    assert target_keys(delete_syncer) == [key for key in TARGET_KEYS if key not in DELETED_KEYS]
+
+
+def test_propagate_deletes_over_the_cap_deletes_nothing(delete_syncer):
+    delete_syncer.config.sync_config['max_deletes'] = 4
+    
+    assert delete_syncer._propagate_deletes(delete_plan(delete_syncer)) == 0
+    assert target_keys(delete_syncer) == TARGET_KEYS
+    assert delete_statements(delete_syncer) == []
+
+
+def test_propagate_deletes_batches_ranges(syncer, sqlite_path, tmp_path):
+    # Every odd key was deleted: 600 single key ranges, 500 per DELETE statement
+    create_items(sqlite_path, item_rows(range(2, 1201, 2)))
+    syncer.config.table_sync_config['T_Item'] = {'sync': True, 'sync_mode': 'incremental', 'primary_key': 'ID'}
+    syncer.config.sync_config['max_deletes'] = 0
+    target_path = str(tmp_path / 'target.db')
+    create_items(target_path, item_rows(range(1, 1201)))
+    syncer.mariadb_conn = SqliteTargetConnection(target_path)
+    
+    assert syncer._propagate_deletes(delete_plan(syncer)) == 600
+    assert len(delete_statements(syncer)) == 2
+    assert target_keys(syncer) == list(range(2, 1201, 2))
+    syncer.mariadb_conn.close()
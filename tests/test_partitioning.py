@@ -0,0 +1,28 @@
+"""Tests for choosing between partitioned and serial table syncs"""
+from sync_daemon import SyncDaemon
+
+
+def partitioned_plan(syncer, batch_size: int) -> dict:
+    columns = syncer.get_table_structure('T_Line')
+    return {'table_name': 'T_Line', 'sync_mode': 'full', 'batch_size': batch_size, 'key_index': 0,
+            'column_types': [col_type for _, col_type in columns]}
+
+
+def test_plan_chunks_splits_large_key_range(syncer):
+    chunks = syncer._plan_chunks(partitioned_plan(syncer, 1), 2)
+    
+    assert [(chunk['lo'], chunk['hi']) for chunk in chunks] == [(1, 3), (4, 5)]
+
+
+def test_plan_chunks_syncs_small_key_range_serially(syncer):
+    assert syncer._plan_chunks(partitioned_plan(syncer, 10), 2) is None
+
+
+def test_daemon_polls_partitioned_tables_serially(syncer, monkeypatch):
+    syncer.config.table_sync_config['T_Line']['partitions'] = 4
+    monkeypatch.setattr(syncer, '_sync_partitioned', lambda plan, partitions: 1 / 0)
+    SyncDaemon(syncer, ['T_Line'])
+    
+    columns = syncer.get_table_structure('T_Line')
+    assert syncer.sync_table_data('T_Line', columns, target_table='T_Line__staging')
+    assert [row[0] for row in syncer.mariadb_conn.rows] == [1, 2, 3, 4, 5]
@@ -0,0 +1,101 @@
+"""Tests for the SQLite stand-in source and syncing from it"""
+from datetime import datetime
+
+import pytest
+
+from source_reader import CliSourceReader, SqliteSourceReader, create_source_reader
+
+
+def cli_reader(output: str) -> CliSourceReader:
+    """Command line reader whose client ignores the query and prints output"""
+    return CliSourceReader(['sh', '-c', f"cat > /dev/null; printf '{output}'"], 'sqlcmd')
+
+
+def test_translate_top_to_limit():
+    query = "SELECT TOP 100 ID, X01 FROM T_Line WHERE (ID > 5) ORDER BY ID"
+    assert SqliteSourceReader.translate(query) == "SELECT ID, X01 FROM T_Line WHERE (ID > 5) ORDER BY ID LIMIT 100"
+    assert SqliteSourceReader.translate("SELECT COUNT(*) FROM T_Line") == "SELECT COUNT(*) FROM T_Line"
+
+
+def test_execute_decodes_values_with_column_types(sqlite_path):
+    with SqliteSourceReader(sqlite_path) as reader:
+        rows = reader.execute("SELECT TOP 1 ID, X02, X09 FROM T_Line ORDER BY ID", ['int', 'datetime', 'bit'])
+    
+    assert rows == [(1, datetime(2025, 4, 1, 8, 30), 1)]
+
+
+def test_create_source_reader_selects_sqlite(syncer):
+    assert isinstance(create_source_reader(syncer.config), SqliteSourceReader)
+
+
+def test_get_table_structure(syncer):
+    assert syncer.get_table_structure('T_Line') == [
+        ('ID', 'int'), ('line', 'nvarchar(50)'), ('date', 'datetime'), ('X05', 'int'), ('X09', 'bit')
+    ]
+
+
+def test_sync_table_data_copies_all_rows(syncer):
+    columns = syncer.get_table_structure('T_Line')
+    
+    assert syncer.sync_table_data('T_Line', columns, target_table='T_Line__staging')
+    
+    written = syncer.mariadb_conn.rows
+    assert [row[0] for row in written] == [1, 2, 3, 4, 5]
+    assert written[0] == (1, 'Line A', datetime(2025, 4, 1, 8, 30), 5, 1)
+    assert written[4] == (5, 'Line B', None, 9, 0)
+    assert syncer.table_stats['T_Line']['rows'] == 5
+
+
+def test_cli_reader_decodes_rows():
+    reader = cli_reader('1\x1fLine A\n2\x1fLine B\n')
+    
+    assert reader.execute('SELECT ID, X01 FROM T_Line', ['int', 'nvarchar(50)']) == [(1, 'Line A'), (2, 'Line B')]
+
+
+def test_cli_reader_raises_on_undecodable_row():
+    reader = cli_reader('1\x1fLine A\nx\x1fLine B\n')
+    
+    with pytest.raises(ValueError):
+        reader.execute('SELECT ID, X01 FROM T_Line', ['int', 'nvarchar(50)'])
+
+
+def test_cli_select_list_escapes_line_breaks_of_text_columns():
+    reader = cli_reader('')
+    
+    select = reader.select_list(['ID', 'X07'], ['int', 'nvarchar(255)'])
+    
+    assert select == ("ID, REPLACE(REPLACE(CAST(X07 AS NVARCHAR(MAX)), CHAR(13), CHAR(29)), CHAR(10), CHAR(30))")
+
+
+def test_cli_reader_keeps_newline_in_last_column():
+    # The client prints the line break of 'hello\nworld' as CHAR(30), so the row stays on one line
+    reader = cli_reader('1\x1fhello\x1eworld\n2\x1fok\n')
+    
+    assert reader.execute('SELECT ID, X07 FROM T_Line', ['int', 'nvarchar(255)']) == [(1, 'hello\nworld'), (2, 'ok')]
+
+
+def test_cli_reader_strips_input_prompts():
+    reader = cli_reader('1> 2> 1\x1fLine A\n2\x1fLine B\n')
+    
+    assert reader.execute('SELECT ID, X01 FROM T_Line', ['int', 'nvarchar(50)']) == [(1, 'Line A'), (2, 'Line B')]
+
+
+def test_cli_reader_raises_on_server_error_with_exit_code_zero():
+    reader = CliSourceReader(
+        ['sh', '-c', "cat > /dev/null; printf '1\x1fLine A\n'; "
+                     "echo 'Msg 208 (severity 16, state 1) Invalid object name T_Line' >&2"],
+        'tsql'
+    )
+    
+    with pytest.raises(RuntimeError, match='Msg 208'):
+        reader.execute('SELECT ID, X01 FROM T_Line', ['int', 'nvarchar(50)'])
+
+
+def test_cli_reader_ignores_informational_messages():
+    reader = CliSourceReader(
+        ['sh', '-c', "cat > /dev/null; printf '1\x1fLine A\n'; "
+                     "echo \"Msg 5701 (severity 0, state 2) Changed database context to 'Production'\" >&2"],
+        'tsql'
+    )
+    
+    assert reader.execute('SELECT ID, X01 FROM T_Line', ['int', 'nvarchar(50)']) == [(1, 'Line A')]
@@ -0,0 +1,34 @@
+"""Tests for SyncTracker file handling"""
+import json
+
+from sync_tracker import SyncTracker
+
+
+def test_save_merges_tables_written_by_other_processes(tmp_path):
+    path = str(tmp_path / 'last_sync.json')
+    first = SyncTracker(path)
+    second = SyncTracker(path)
+    
+    first.set_change_version('T_A', 1)
+    second.set_change_version('T_B', 2)
+    
+    with open(path) as f:
+        data = json.load(f)
+    assert data['T_A']['change_version'] == 1
+    assert data['T_B']['change_version'] == 2
+
+
+def test_save_over_corrupt_file_keeps_other_tables(tmp_path):
+    path = str(tmp_path / 'last_sync.json')
+    tracker = SyncTracker(path)
+    tracker.set_change_version('T_A', 1)
+    tracker.set_change_version('T_B', 2)
+    
+    with open(path, 'w') as f:
+        f.write('{"T_A": ')
+    tracker.set_change_version('T_B', 3)
+    
+    with open(path) as f:
+        data = json.load(f)
+    assert data['T_A']['change_version'] == 1
+    assert data['T_B']['change_version'] == 3
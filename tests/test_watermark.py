@@ -0,0 +1,86 @@
+"""Tests for the (timestamp, primary key) watermark of incremental syncs"""
+import sqlite3
+
+import pytest
+
+from conftest import RecordingConnection
+
+
+@pytest.fixture
+def incremental_syncer(syncer, sqlite_path):
+    """Incremental sync of T_Line on X02; timestamps in the ISO format of watermark literals"""
+    # SQLite compares datetimes as text, so they must match the literal format
+    connection = sqlite3.connect(sqlite_path)
+    connection.execute("UPDATE T_Line SET X02 = REPLACE(X02, ' ', 'T')")
+    connection.commit()
+    connection.close()
+    
+    syncer.config.table_sync_config['T_Line'].update({'sync_mode': 'incremental', 'timestamp_column': 'X02'})
+    return syncer
+
+
+def add_line(path: str, row_id: int, timestamp: str):
+    connection = sqlite3.connect(path)
+    connection.execute("INSERT INTO T_Line VALUES (?, 'Line D', ?, 1, 1)", (row_id, timestamp))
+    connection.commit()
+    connection.close()
+
+
+def test_second_run_picks_up_row_sharing_last_timestamp(incremental_syncer, sqlite_path):
+    syncer = incremental_syncer
+    tracker = syncer.sync_tracker
+    columns = syncer.get_table_structure('T_Line')
+    
+    assert syncer.sync_table_data('T_Line', columns)
+    assert [row[0] for row in syncer.mariadb_conn.rows] == [1, 2, 3, 4, 5]
+    assert tracker.get_last_sync('T_Line') == '2025-04-02T11:00:00.000'
+    assert tracker.get_last_sync_key('T_Line') == 4
+    
+    # Same timestamp as the last synced row, higher ID
+    add_line(sqlite_path, 6, '2025-04-02T11:00:00.000')
+    syncer.mariadb_conn = RecordingConnection()
+    
+    assert syncer.sync_table_data('T_Line', columns)
+    assert [row[0] for row in syncer.mariadb_conn.rows] == [6]
+    assert tracker.get_last_sync('T_Line') == '2025-04-02T11:00:00.000'
+    assert tracker.get_last_sync_key('T_Line') == 6
+    
+    # Nothing new: nothing is sent again
+    syncer.mariadb_conn = RecordingConnection()
+    assert syncer.sync_table_data('T_Line', columns)
+    assert syncer.mariadb_conn.rows == []
+
+
+def test_failed_partitioned_run_keeps_watermark(incremental_syncer, monkeypatch):
+    syncer = incremental_syncer
+    tracker = syncer.sync_tracker
+    tracker.complete_sync('T_Line', '2025-03-01T00:00:00.000', 0)
+    
+    syncer.config.table_sync_config['T_Line']['partitions'] = 2
+    syncer.config.sync_config.update({'batch_size': 1, 'min_batch_size': 1, 'max_batch_size': 1, 'max_retries': 1})
+    
+    # Chunk workers share one recording connection; the second chunk (IDs 3-4) fails
+    target = syncer.mariadb_conn
+    
+    def connect_mariadb():
+        syncer.mariadb_conn = target
+        return True
+    
+    sync_key_range = syncer._sync_key_range
+    
+    def failing_key_range(plan, last_key, upper_key=None, on_commit=None):
+        if upper_key == 4:
+            raise RuntimeError("source connection lost")
+        return sync_key_range(plan, last_key, upper_key, on_commit)
+    
+    monkeypatch.setattr(syncer, 'connect_mariadb', connect_mariadb)
+    monkeypatch.setattr(syncer, '_sync_key_range', failing_key_range)
+    
+    columns = syncer.get_table_structure('T_Line')
+    assert not syncer.sync_table_data('T_Line', columns)
+    
+    assert sorted(row[0] for row in target.rows) == [1, 2]
+    assert tracker.get_last_sync('T_Line') == '2025-03-01T00:00:00.000'
+    assert tracker.get_last_sync_key('T_Line') == 0
+    # The finished chunk is kept so the next run only retries the failed one
+    assert [chunk['done'] for chunk in tracker.get_chunks('T_Line')] == [True, False]